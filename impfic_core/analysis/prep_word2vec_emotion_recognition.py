@@ -36,7 +36,7 @@ def select_token(token: Token, pattern: PatternNL) -> bool:
 
 
 def clean_token(token: Token, use_lemma: bool = False) -> str:
-    token_rep = token.lemma if use_lemma is True else token.text
+    token_rep = token.lemma if use_lemma else token.text
     return token_rep.replace('_', '').lower()
 
 
@@ -44,7 +44,7 @@ def main():
     input_dir = '../data/books/txts_trankit_parsed/'
     output_dir = '../data/books/novels_tokens'
 
-    if os.path.exists(output_dir) is False:
+    if not os.path.exists(output_dir):
         os.mkdir(output_dir)
 
     input_fpaths = glob.glob(os.path.join(input_dir, '**/*.gz'))
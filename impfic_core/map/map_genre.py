@@ -82,7 +82,7 @@ def map_genre(nurs):
         for nur in NUR_MAPPINGS:
             if str(nur) in nurs:
                 return NUR_MAPPINGS[nur]
-        if any([280 <= int(nur) <= 350 for nur in nurs]):
+        if any(280 <= int(nur) <= 350 for nur in nurs):
             return "Other fiction"
         else:
             return "Non-fiction"
@@ -106,13 +106,13 @@ def make_work_genre_map():
     d = work_genre[['record_id', 'nur_genre']].to_dict()
 
     work_genre_map = {d['record_id'][i]: d['nur_genre'][i] for i in d['record_id'] if
-                      pd.isna(d['nur_genre'][i]) is False}
+                      not pd.isna(d['nur_genre'][i])}
     len(work_genre_map)
     return work_genre_map
 
 
 def read_work_genre_file(work_genre_file: str, as_dataframe: bool = False):
-    if as_dataframe is True:
+    if as_dataframe:
         return pd.read_csv(work_genre_file, sep='\t', compression='gzip', dtype=DTYPE)
     else:
         return read_work_genre_file_generator(work_genre_file)
@@ -167,13 +167,13 @@ class WorkGenre:
 def map_id_to_genre(row, work_genre_map):
     genres = set()
     # keep nur if review already has one
-    if pd.isna(row['genre']) is False:
+    if not pd.isna(row['genre']):
         # print('adding row genre:', row['genre'])
         genres.add(row['genre'])
-    if row['book_id'] in work_genre_map and pd.isna(work_genre_map[row['book_id']]) is False:
+    if row['book_id'] in work_genre_map and not pd.isna(work_genre_map[row['book_id']]):
         # print('adding book_id genre:', work_genre_map[row['book_id']])
         genres.add(work_genre_map[row['book_id']])
-    if row['isbn'] in work_genre_map and pd.isna(work_genre_map[row['isbn']]) is False:
+    if row['isbn'] in work_genre_map and not pd.isna(work_genre_map[row['isbn']]):
         # print('adding isbn genre:', work_genre_map[row['isbn']])
         genres.add(work_genre_map[row['isbn']])
     # print(genres)
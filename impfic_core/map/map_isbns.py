@@ -1,6 +1,7 @@
 import gzip
 import json
 from collections import defaultdict
+from itertools import product
 from typing import Dict, List, Set, Tuple
 
 import networkx as nx
@@ -55,7 +56,7 @@ def get_work_nurs(work_info: Dict[str, any]) -> Set[int]:
         if isbn_info['in_kbcb'] and 'nur' in isbn_info['kbcb_info']:
             nurs = set(isbn_info['kbcb_info']['nur'])
             work_nurs = work_nurs.union(nurs)
-    assert all([isinstance(nur, int) for nur in work_nurs]), "work_info contains nurs that are not integers"
+    assert all(isinstance(nur, int) for nur in work_nurs), "work_info contains nurs that are not integers"
     return work_nurs
 
 
@@ -73,11 +74,12 @@ class WorkMetadata:
         ppn_node_names = [f"ppn__{ppn_id}" for ppn_id in ppn_ids]
         for node_name in ppn_node_names:
             self.work_graph.add_node(node_name, **{'type': 'ppn'})
+        isbn_node_names = []
         for isbn in isbns:
             isbn_node, attr_dict = self.make_isbn_node(isbn, subjects)
             self.work_graph.add_node(isbn_node, **attr_dict)
-            for ppn_node in ppn_node_names:
-                self.work_graph.add_edge(isbn_node, ppn_node)
+            isbn_node_names.append(isbn_node)
+        self.work_graph.add_edges_from(product(isbn_node_names, ppn_node_names))
 
     def make_isbn_node(self, isbn: str, subjects: Dict[str, Set[str]]) -> Tuple[str, Dict[str, any]]:
         node_name = f"isbn__{isbn}"
@@ -1,11 +1,22 @@
 import json
-from dataclasses import dataclass, field
-from typing import Dict, List
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, Generator, Iterable, List, Union
+
+import numpy as np
+
+# NER tag prefixes (BIOES scheme) that close any entity currently being collected
+NER_BOUNDARY_PREFIXES = frozenset('OBS')
 
 
 @dataclass
 class Token:
 
+    # no per-instance __dict__, as a parsed book holds millions of tokens
+    __slots__ = ('id', 'doc_idx', 'text', 'lemma', 'upos', 'xpos', 'xpos_dict', 'feats',
+                 'head', 'deprel', 'ner', 'start', 'end')
+
     id: int
     doc_idx: int
     text: str
@@ -30,6 +41,8 @@ class Token:
 @dataclass
 class Entity:
 
+    __slots__ = ('tokens', 'text', 'start', 'end', 'label')
+
     tokens: List[Token]
     text: str
     start: int
@@ -85,44 +98,65 @@ class Doc:
         return [ent for sent in self.sentences for ent in sent.entities]
 
     def __len__(self):
-        return len(self.tokens)
-
-
-def parse_features(features: str) -> Dict[str, any]:
-    feats = [feat for feat in features.split('|') if len(feat) > 0]
+        return sum(len(sent.tokens) for sent in self.sentences)
+
+    def as_arrays(self) -> Dict[str, np.ndarray]:
+        """Return the token properties of the document as a dictionary of parallel arrays,
+        one array per property with one element per token, for column-wise analysis."""
+        tokens = self.tokens
+        num_tokens = len(tokens)
+        arrays = {
+            'sent_idx': np.fromiter((si for si, sent in enumerate(self.sentences) for _ in sent.tokens),
+                                    dtype=np.int32, count=num_tokens)
+        }
+        for int_field in ['id', 'doc_idx', 'head', 'start', 'end']:
+            arrays[int_field] = np.fromiter((getattr(token, int_field) for token in tokens),
+                                            dtype=np.int32, count=num_tokens)
+        for str_field in ['text', 'lemma', 'upos', 'xpos', 'deprel', 'ner']:
+            arrays[str_field] = np.array([getattr(token, str_field) for token in tokens], dtype=object)
+        return arrays
+
+
+def intern_tag(tag: Union[str, None], max_length: int = 32) -> Union[str, None]:
+    """Intern a categorical tag string (e.g. UPOS, XPOS, deprel or NER label), so that all
+    tokens share the same string object per tag. Long tags (e.g. compound morphological
+    XPOS tags) are unbounded in number and are returned as is."""
+    if tag is None or len(tag) >= max_length:
+        return tag
+    return sys.intern(tag)
+
+
+def parse_features(features: Union[str, None]) -> Dict[str, any]:
     feature_dict = {}
-    for feat in feats:
-        if '=' in feat:
-            key, value = feat.split('=')
+    if not features:
+        return feature_dict
+    for feat in features.split('|'):
+        if len(feat) == 0:
+            continue
+        key, sep, value = feat.partition('=')
+        if not sep:
+            feature_dict[key] = True
         else:
-            key, value = feat, True
-        feature_dict[key] = int(value) if isinstance(value, str) and value.isdigit() else value
-    # feats = [feat.split('=') for feat in features.split('|') if len(feat) > 0]
-    # for key, value in feats:
-    #     feature_dict[key] = int(value) if value.isdigit() else value
+            feature_dict[key] = int(value) if value.isdigit() else value
     return feature_dict
 
 
 def trankit_json_to_token(doc_idx: int, sent_idx: int, token: Dict[str, any]) -> Token:
-    try:
-        return Token(
-            id=sent_idx,
-            doc_idx=doc_idx,
-            text=token['text'],
-            lemma=token['lemma'],
-            upos=token['upos'],
-            xpos=token['xpos'],
-            xpos_dict=parse_features(token['xpos']) if '|' in token['xpos'] else {},
-            head=token['head'] - 1,
-            feats=parse_features(token['feats']) if 'feats' in token else {},
-            start=token['dspan'][0],
-            end=token['dspan'][1],
-            deprel=token['deprel'] if 'deprel' in token else None,
-            ner=token['ner'] if 'ner' in token else None
-        )
-    except ValueError:
-        print(f"Error in token with doc_idx '{doc_idx}', sent_idx '{sent_idx}': {token}")
-        raise
+    return Token(
+        id=sent_idx,
+        doc_idx=doc_idx,
+        text=token['text'],
+        lemma=token['lemma'],
+        upos=intern_tag(token['upos']),
+        xpos=intern_tag(token['xpos']),
+        xpos_dict=parse_features(token['xpos']) if '|' in token['xpos'] else {},
+        head=token['head'] - 1,
+        feats=parse_features(token.get('feats')),
+        start=token['dspan'][0],
+        end=token['dspan'][1],
+        deprel=intern_tag(token.get('deprel')),
+        ner=intern_tag(token.get('ner'))
+    )
 
 
 def spacy_json_to_token(doc_idx: int, sent_idx: int, token: Dict[str, any], doc: Dict[str, any]) -> Token:
@@ -132,15 +166,15 @@ def spacy_json_to_token(doc_idx: int, sent_idx: int, token: Dict[str, any], doc:
         doc_idx=doc_idx,
         text=doc['text'][token['start']:token['end']],
         lemma=token['lemma'],
-        upos=token['pos'],
-        xpos=token['tag'],
+        upos=intern_tag(token['pos']),
+        xpos=intern_tag(token['tag']),
         xpos_dict=parse_features(token['tag']) if '|' in token['tag'] else {},
         head=token['head'] - head_shift,
-        feats=parse_features(token['morph']) if 'morph' in token else {},
+        feats=parse_features(token.get('morph')),
         start=token['start'],
         end=token['end'],
-        deprel=token['dep'] if 'dep' in token else None,
-        ner=token['ner'] if 'ner' in token else None
+        deprel=intern_tag(token.get('dep')),
+        ner=intern_tag(token.get('ner'))
     )
 
 
@@ -186,7 +220,7 @@ def trankit_json_to_entities(sent_tokens: List[Token], sent: Dict[str, any]) ->
         return entities
     sent_start = sent_tokens[0].start
     for token in sent_tokens:
-        if token.ner[0] in 'OBS':
+        if token.ner[0] in NER_BOUNDARY_PREFIXES:
             if len(entity_tokens) > 0:
                 entity = trankit_json_to_entity(entity_tokens, sent, sent_start)
                 entities.append(entity)
@@ -215,17 +249,31 @@ def spacy_json_to_sentence(sent_idx: int, token_offset: int, sent: Dict[str, any
 
 def trankit_json_to_sentence(token_offset: int, sentence: Dict[str, any],
                              skip_bad_tokens: bool = False) -> Sentence:
-    if skip_bad_tokens is True:
-        tokens = []
-        for ti, token in enumerate(sentence['tokens']):
+    """Turn a Trankit sentence into a Sentence, detecting NER entities while the
+    tokens are created instead of in a second pass over the tokens."""
+    tokens = []
+    entities = []
+    entity_tokens = []
+    sent_start = None
+    for ti, token_json in enumerate(sentence['tokens']):
+        if skip_bad_tokens:
             try:
-                token = trankit_json_to_token(ti+token_offset, ti, token)
-                tokens.append(token)
+                token = trankit_json_to_token(ti+token_offset, ti, token_json)
             except KeyError:
                 continue
-    else:
-        tokens = [trankit_json_to_token(ti+token_offset, ti, token) for ti, token in enumerate(sentence['tokens'])]
-    entities = trankit_json_to_entities(tokens, sentence)
+        else:
+            token = trankit_json_to_token(ti+token_offset, ti, token_json)
+        tokens.append(token)
+        if sent_start is None:
+            sent_start = token.start
+        if token.ner[0] in NER_BOUNDARY_PREFIXES:
+            if len(entity_tokens) > 0:
+                entities.append(trankit_json_to_entity(entity_tokens, sentence, sent_start))
+            entity_tokens = []
+        if token.ner != 'O':
+            entity_tokens.append(token)
+    if len(entity_tokens) > 0:
+        entities.append(trankit_json_to_entity(entity_tokens, sentence, sent_start))
     return Sentence(
         id=sentence['id'],
         text=sentence['text'],
@@ -249,31 +297,40 @@ def json_to_doc(doc_json: Dict[str, any]) -> Doc:
     return doc
 
 
+def json_docs_to_docs(docs_json: Iterable[Dict[str, any]], workers: int = None,
+                      chunksize: int = 64) -> Generator[Doc, None, None]:
+    """Turn a sequence of parsed SpaCy or Trankit JSON documents into Docs, spreading the
+    conversion over a pool of worker processes. Docs are yielded in the input order."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(json_to_doc, docs_json, chunksize=chunksize)
+
+
 def sort_spacy_tokens_by_sents(doc_json: Dict[str, any], token_type: str) -> List[List[Dict[str, any]]]:
-    sent_idx = 0
-    curr_sent = doc_json['sents'][sent_idx]
-    sents_tokens = []
-    sent_tokens = []
-    for token in doc_json[token_type]:
-        while token['start'] >= curr_sent['end']:
-            sents_tokens.append(sent_tokens)
-            sent_tokens = []
-            sent_idx += 1
-            curr_sent = doc_json['sents'][sent_idx]
-        if token['end'] > curr_sent['end']:
-            print(f"WARNING: end of token ({token['end']}) beyond end of sentence ({curr_sent['end']}).")
-            print('sent_idx:', sent_idx)
-            print('curr_sent:', curr_sent)
-            print('token:', token)
-        assert token['end'] <= curr_sent['end'], f"token['end'] ({token['end']}) " \
-                                                 f"after curr_sent['end'] ({curr_sent['end']})"
-        sent_tokens.append(token)
-    if len(sent_tokens) > 0:
-        sents_tokens.append(sent_tokens)
-    if len(doc_json[token_type]) == 0:
-        for _ in doc_json['sents']:
-            sents_tokens.append([])
-    return sents_tokens
+    """Group the tokens (or entities) of a SpaCy JSON document per sentence, based on
+    their character offsets. Returns one (possibly empty) list per sentence."""
+    tokens = doc_json[token_type]
+    num_sents = len(doc_json['sents'])
+    token_starts = np.fromiter((token['start'] for token in tokens), dtype=np.int64, count=len(tokens))
+    token_ends = np.fromiter((token['end'] for token in tokens), dtype=np.int64, count=len(tokens))
+    sent_ends = np.fromiter((sent['end'] for sent in doc_json['sents']), dtype=np.int64, count=num_sents)
+    # a token belongs to the first sentence that ends after the token starts
+    token_sent_idx = np.searchsorted(sent_ends, token_starts, side='right')
+    if len(tokens) > 0 and token_sent_idx[-1] >= num_sents:
+        bad_idx = int(np.argmax(token_sent_idx >= num_sents))
+        raise IndexError(f"token start ({tokens[bad_idx]['start']}) beyond end of last sentence")
+    beyond_sent = token_ends > sent_ends[token_sent_idx]
+    if beyond_sent.any():
+        bad_idx = int(np.argmax(beyond_sent))
+        curr_sent = doc_json['sents'][token_sent_idx[bad_idx]]
+        token = tokens[bad_idx]
+        print(f"WARNING: end of token ({token['end']}) beyond end of sentence ({curr_sent['end']}).")
+        print('sent_idx:', token_sent_idx[bad_idx])
+        print('curr_sent:', curr_sent)
+        print('token:', token)
+        raise AssertionError(f"token['end'] ({token['end']}) after curr_sent['end'] ({curr_sent['end']})")
+    # offsets of the first token of each sentence, plus the end of the token list
+    boundaries = np.searchsorted(token_sent_idx, np.arange(num_sents + 1), side='left').tolist()
+    return [tokens[boundaries[si]:boundaries[si + 1]] for si in range(num_sents)]
 
 
 def spacy_json_to_doc(doc_json: Dict[str, any]) -> Doc:
@@ -299,9 +356,34 @@ def trankit_json_to_doc(doc_json: Dict[str, any], skip_bad_tokens: bool = False)
     return Doc(text=doc_json['text'], sentences=sentences)
 
 
+def shift_sentence(sentence: Sentence, char_offset: int, token_offset: int) -> Sentence:
+    """Return a copy of a sentence with its character offsets and the document index of its
+    tokens shifted by the given offsets, e.g. to place it in a merged document."""
+    if char_offset == 0 and token_offset == 0:
+        return sentence
+    new_tokens = {}
+    for token in sentence.tokens:
+        new_tokens[id(token)] = replace(token, doc_idx=token.doc_idx + token_offset,
+                                        start=token.start + char_offset, end=token.end + char_offset)
+    entities = [replace(entity, tokens=[new_tokens[id(token)] for token in entity.tokens],
+                        start=entity.start + char_offset, end=entity.end + char_offset)
+                for entity in sentence.entities]
+    return replace(sentence, tokens=list(new_tokens.values()), entities=entities,
+                   start=sentence.start + char_offset, end=sentence.end + char_offset)
+
+
 def merge_docs(docs: List[Doc]) -> Doc:
-    """Merge a list of Docs into a single Doc instance."""
+    """Merge a list of Docs into a single Doc instance. The character offsets and token
+    document indexes of each Doc are shifted to their position in the merged Doc."""
+    sentences = []
+    char_offset = 0
+    token_offset = 0
+    for chunk in docs:
+        sentences.extend(shift_sentence(sent, char_offset, token_offset) for sent in chunk.sentences)
+        # add one for the newline that separates the chunk texts
+        char_offset += len(chunk.text) + 1
+        token_offset += sum(len(sent) for sent in chunk.sentences)
     return Doc(
-        text='\n'.join([chunk.text for chunk in docs]),
-        sentences=[sent for chunk in docs for sent in chunk.sentences]
+        text='\n'.join(chunk.text for chunk in docs),
+        sentences=sentences
     )
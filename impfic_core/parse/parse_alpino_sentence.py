@@ -1,92 +1,226 @@
-from typing import Dict, Generator, List, Union
+from typing import Dict, Iterable, List, Union
 
 import json
+import sys
+from collections import defaultdict
+from operator import itemgetter
 
-SENT_TAGS = {'smain', 'ssub', 'svan', 'sv1'}
-MAIN_VERBAL_TAGS = {'smain', 'ssub', 'svan', 'sv1', 'inf', 'ti', 'oti', 'ppart', 'ppres'}
+SENT_TAGS = frozenset({'smain', 'ssub', 'svan', 'sv1'})
+MAIN_VERBAL_TAGS = frozenset({'smain', 'ssub', 'svan', 'sv1', 'inf', 'ti', 'oti', 'ppart', 'ppres'})
+
+# phrase categories of the node a relative head refers to
+RELATIVE_HEAD_PHRASE_TAGS = frozenset({'np', 'ap'})
 
 MAIN_COMPLEMENT_TAGS = {'hd', 'su', 'sup', 'obj1', 'pobj1', 'se', 'obj2', 'predc', 'vc', 'pc',
                         'me', 'ld', 'svp'}
 
+TAG_PROPERTIES = ['@rel', '@cat', '@lcat', '@pos', '@pt']
+
+# bit flags for node predicates, computed once per node by parse_tree
+SENT_NODE_FLAG = 1
+MAIN_VERBAL_FLAG = 2
+VERBAL_FLAG = 4
+FINITE_VERB_FLAG = 8
+REFERENCE_NODE_FLAG = 16
+
+# node properties with a small set of values that are compared against constants
+INTERNED_PROPERTIES = ('@rel', '@cat', '@lcat', '@pos', '@pt', '@wvorm', '@vwtype', '@case')
+
+
+class NodeIndex(dict):
+    """A node ID -> node dictionary for the nodes of a single sentence tree, with
+    lookup indexes over those nodes. Each index is built on first use by a single
+    pass over the nodes, so the nodes should not change after that."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tag_nodes = None
+        self._referent_nodes = None
+        self._personal_pronouns = None
+        self._sent_nodes = None
+        self._main_verbal_nodes = None
+        # per-node results of tree walks, keyed on node ID
+        self.descendant_words = {}
+        self.main_verbs = {}
+        self.node_words = {}
+        self.ancestor_ids = {}
+
+    @property
+    def tag_nodes(self) -> Dict[str, List[Dict[str, any]]]:
+        """Tag -> nodes index, with a node listed once for each tag property that has the tag."""
+        if self._tag_nodes is None:
+            self._tag_nodes = defaultdict(list)
+            for node in self.values():
+                for tag_prop in TAG_PROPERTIES:
+                    if tag_prop in node:
+                        self._tag_nodes[node[tag_prop]].append(node)
+        return self._tag_nodes
+
+    @property
+    def referent_nodes(self) -> Dict[str, Dict[str, any]]:
+        """Index -> node index of the first node with lexical content or a category per index."""
+        if self._referent_nodes is None:
+            self._referent_nodes = {}
+            for node in self.values():
+                if '@index' in node and ('@word' in node or '@cat' in node):
+                    self._referent_nodes.setdefault(node['@index'], node)
+        return self._referent_nodes
+
+    @property
+    def personal_pronouns(self) -> List[Dict[str, any]]:
+        if self._personal_pronouns is None:
+            self._personal_pronouns = [node for node in self.values() if is_personal_pronoun(node)]
+        return self._personal_pronouns
+
+    @property
+    def sent_nodes(self) -> List[Dict[str, any]]:
+        if self._sent_nodes is None:
+            self._sent_nodes = [node for node in self.values() if is_sent_node(node)]
+        return self._sent_nodes
+
+    @property
+    def main_verbal_nodes(self) -> List[Dict[str, any]]:
+        if self._main_verbal_nodes is None:
+            self._main_verbal_nodes = [node for node in self.values() if is_main_verbal(node)]
+        return self._main_verbal_nodes
+
+
+def as_node_index(nodes: Dict[int, Dict[str, any]]) -> NodeIndex:
+    """Return the given nodes as a NodeIndex, wrapping them if they are a plain dictionary."""
+    return nodes if isinstance(nodes, NodeIndex) else NodeIndex(nodes)
+
+
+def get_child_nodes(node: Dict[str, any]) -> List[Dict[str, any]]:
+    """Return the list of child nodes of a given node. A single child is stored as a dictionary
+    instead of a list, and a node without children has no 'node' property."""
+    children = node.get('node')
+    if children is None:
+        return []
+    elif isinstance(children, list):
+        return children
+    else:
+        return [children]
+
 
 def invert_tree(curr_node: Dict[str, any], inverse_tree: Dict[int, int],
-                nodes: Dict[int, Dict[str, any]]) -> None:
-    """Fill an inverse tree and dictionary of node IDs and nodes for a given node."""
-    if "node" not in curr_node:
-        nodes[curr_node["@id"]] = curr_node
-    elif isinstance(curr_node["node"], list):
-        for child_node in curr_node["node"]:
-            inverse_tree[child_node["@id"]] = curr_node["@id"]
-            nodes[child_node["@id"]] = child_node
-            invert_tree(child_node, inverse_tree, nodes)
-    elif isinstance(curr_node["node"], dict):
-        # print(curr_node)
-        inverse_tree[curr_node["node"]["@id"]] = curr_node["@id"]
-        invert_tree(curr_node["node"], inverse_tree, nodes)
-    nodes[curr_node['@id']] = curr_node
+                nodes: Dict[int, Dict[str, any]], normalise_children: bool = False) -> None:
+    """Fill an inverse tree and dictionary of node IDs and nodes for a given node.
+    With normalise_children, a single child node stored as a dictionary is replaced
+    by a list containing that child, so all nodes with children have a list of children."""
+    # Walk the tree with an explicit stack. Nodes in a list of children are added to nodes
+    # before their descendants, single child nodes and the given node after their descendants.
+    stack = [(curr_node, None, False, False)]
+    while stack:
+        node, parent_id, in_list, is_done = stack.pop()
+        if is_done:
+            nodes[node['@id']] = node
+            continue
+        if parent_id is not None:
+            inverse_tree[node['@id']] = parent_id
+        if in_list:
+            nodes[node['@id']] = node
+        if "node" not in node:
+            nodes[node['@id']] = node
+            continue
+        stack.append((node, None, False, True))
+        if isinstance(node["node"], list):
+            for child_node in reversed(node["node"]):
+                stack.append((child_node, node["@id"], True, False))
+        elif isinstance(node["node"], dict):
+            child_node = node["node"]
+            if normalise_children:
+                node["node"] = [child_node]
+            stack.append((child_node, node["@id"], False, False))
 
 
 def get_word_nodes(curr_node: Dict[str, any]):
     """Return all descendants nodes that have '@word' property for a given node."""
     word_nodes = []
-    if "@word" in curr_node:
-        return [curr_node]
-    elif "node" not in curr_node:
-        return []
-    elif isinstance(curr_node["node"], list):
-        for child_node in curr_node["node"]:
-            child_words = get_word_nodes(child_node)
-            word_nodes += child_words
-    elif isinstance(curr_node["node"], dict):
-        child_node = curr_node["node"]
-        word_nodes += get_word_nodes(child_node)
-    else:
-        print(curr_node)
-        raise TypeError("Unknown node type")
+    stack = [curr_node]
+    while stack:
+        node = stack.pop()
+        if "@word" in node:
+            word_nodes.append(node)
+        elif "node" not in node:
+            continue
+        elif isinstance(node["node"], list):
+            stack.extend(reversed(node["node"]))
+        elif isinstance(node["node"], dict):
+            stack.append(node["node"])
+        else:
+            print(node)
+            raise TypeError("Unknown node type")
     return word_nodes
 
 
 def parse_tree(sent: Dict[str, any]):
     """Return the node tree, the inverse node tree and a node ID -> node dictionary
-    for a given Elasticsearch-indexed alpino sentence."""
+    for a given Elasticsearch-indexed alpino sentence. In the returned tree, the children
+    of each node with children are stored as a list, and each node has its predicate
+    bit flags stored under '_flags'."""
     tree = json.loads(sent["alpino_ds"])
     root = tree["node"]
     inverse_tree = {}
-    nodes = {}
-    invert_tree(root, inverse_tree, nodes)
+    nodes = NodeIndex()
+    invert_tree(root, inverse_tree, nodes, normalise_children=True)
+    for node in nodes.values():
+        for prop in INTERNED_PROPERTIES:
+            value = node.get(prop)
+            if isinstance(value, str):
+                node[prop] = sys.intern(value)
+        node['_flags'] = compute_node_flags(node)
     return tree, inverse_tree, nodes
 
 
+def compute_node_flags(node: Dict[str, any]) -> int:
+    """Return the predicate bit flags for a given node."""
+    flags = 0
+    cat = node.get('@cat')
+    if cat in SENT_TAGS:
+        flags |= SENT_NODE_FLAG
+    if cat in MAIN_VERBAL_TAGS:
+        flags |= MAIN_VERBAL_FLAG | VERBAL_FLAG
+    elif node.get('@rel') == 'vc':
+        flags |= VERBAL_FLAG
+    if node.get('@wvorm') == 'pv':
+        flags |= FINITE_VERB_FLAG
+    if '@index' in node and '@word' not in node and cat is None:
+        flags |= REFERENCE_NODE_FLAG
+    return flags
+
+
+def get_node_flags(node: Dict[str, any]) -> int:
+    """Return the predicate bit flags of a given node, using the flags set by parse_tree if present."""
+    flags = node.get('_flags')
+    return compute_node_flags(node) if flags is None else flags
+
+
 def get_nodes_by_tag(tag: str, nodes: Dict[int, Dict[str, any]]) -> List[Dict[str, any]]:
     """Return all nodes that contain a given tag. Tags are looked up in properties
-    cat, lcat, pos and pt"""
-    tag_nodes = []
-    for node_id in nodes:
-        node = nodes[node_id]
-        if '@rel' in node and node['@rel'] == tag:
-            tag_nodes.append(node)
-        if '@cat' in node and node['@cat'] == tag:
-            tag_nodes.append(node)
-        if '@lcat' in node and node['@lcat'] == tag:
-            tag_nodes.append(node)
-        if '@pos' in node and node['@pos'] == tag:
-            tag_nodes.append(node)
-        if '@pt' in node and node['@pt'] == tag:
-            tag_nodes.append(node)
-    return tag_nodes
+    rel, cat, lcat, pos and pt"""
+    tag_nodes = as_node_index(nodes).tag_nodes
+    return list(tag_nodes[tag]) if tag in tag_nodes else []
+
+
+def get_ancestor_ids(node: Dict[str, any], inverse_tree: Dict[int, int]) -> List[int]:
+    """Return the IDs of the ancestors of a given node, starting with its parent."""
+    ancestor_ids = []
+    parent_id = inverse_tree.get(node['@id'])
+    while parent_id is not None:
+        ancestor_ids.append(parent_id)
+        parent_id = inverse_tree.get(parent_id)
+    return ancestor_ids
 
 
 def is_descendant_of(node1, node2, nodes, inverse_tree):
-    if node1 == node2:
-        return False
-    if node1['@id'] not in inverse_tree:
-        return False
-    parent = nodes[inverse_tree[node1['@id']]]
-    while parent and parent['@id'] in inverse_tree:
-        parent = nodes[inverse_tree[parent['@id']]]
-        if parent == node2:
-            break
-    return parent == node2
+    """Check if node1 is a descendant of node2. If the sentence nodes are given as a
+    NodeIndex, the ancestors of node1 are collected only once."""
+    if not isinstance(nodes, NodeIndex):
+        return node2['@id'] in get_ancestor_ids(node1, inverse_tree)
+    node_id = node1['@id']
+    if node_id not in nodes.ancestor_ids:
+        nodes.ancestor_ids[node_id] = frozenset(get_ancestor_ids(node1, inverse_tree))
+    return node2['@id'] in nodes.ancestor_ids[node_id]
 
 
 def is_ancestor_of(node1, node2, nodes, inverse_tree):
@@ -97,35 +231,35 @@ def is_sent_node(node: Dict[str, any]) -> bool:
     """Check if node is a main verbal complement."""
     if node is None:
         return False
-    return '@cat' in node and node['@cat'] in SENT_TAGS
+    return get_node_flags(node) & SENT_NODE_FLAG != 0
 
 
 def is_main_verbal(node: Dict[str, any]) -> bool:
     """Check if node is a main verbal complement."""
     if node is None:
         return False
-    return '@cat' in node and node['@cat'] in MAIN_VERBAL_TAGS
+    return get_node_flags(node) & MAIN_VERBAL_FLAG != 0
 
 
 def is_verbal(node: Dict[str, any]) -> bool:
     """Check if a node is a verbal complement (verb complement or main verbal complement)."""
     if node is None:
         return False
-    return node['@rel'] == 'vc' or is_main_verbal(node)
+    return get_node_flags(node) & VERBAL_FLAG != 0
 
 
 def is_finite_verb(node: Dict[str, any]) -> bool:
     """Check if a node is a finite verb."""
     if node is None:
         return False
-    return '@wvorm' in node and node['@wvorm'] == 'pv'
+    return get_node_flags(node) & FINITE_VERB_FLAG != 0
 
 
 def is_reference_node(node: Dict[str, any]) -> bool:
     """Check if a node nas no lexical content but references another node."""
     if node is None:
         return False
-    return '@index' in node and '@word' not in node and '@cat' not in node
+    return get_node_flags(node) & REFERENCE_NODE_FLAG != 0
 
 
 def is_referent_node(node: Dict[str, any], ref_node: Dict[str, any]) -> bool:
@@ -163,52 +297,77 @@ def is_accusative_pronoun(node):
 def get_referent_node(ref_node: Dict[str, any],
                       nodes: Dict[int, Dict[str, any]]) -> Union[None, Dict[str, any]]:
     """Return the referent node for a given reference node."""
-    for node_id in nodes:
-        node = nodes[node_id]
-        if is_referent_node(node, ref_node):
-            return node
-    return None
+    if ref_node is None or '@index' not in ref_node:
+        return None
+    return as_node_index(nodes).referent_nodes.get(ref_node['@index'])
 
 
 def get_personal_pronouns(nodes: Dict[int, Dict[str, any]]) -> List[Dict[str, any]]:
     """Return all personal pronouns nodes for a given sentence-like node."""
-    return [nodes[node_id] for node_id in nodes if is_personal_pronoun(nodes[node_id])]
+    return list(as_node_index(nodes).personal_pronouns)
 
 
 def get_possessive_pronouns(nodes: Dict[int, Dict[str, any]]) -> List[Dict[str, any]]:
     """Return all possessive pronouns nodes for a given sentence-like node."""
-    return [nodes[node_id] for node_id in nodes if is_possessive_pronoun(nodes[node_id])]
+    return [node for node in as_node_index(nodes).personal_pronouns if is_possessive_pronoun(node)]
 
 
 def get_accusative_pronouns(nodes: Dict[int, Dict[str, any]]) -> List[Dict[str, any]]:
     """Return all accusative pronouns nodes for a given sentence-like node."""
-    return [nodes[node_id] for node_id in nodes if is_accusative_pronoun(nodes[node_id])]
+    return [node for node in as_node_index(nodes).personal_pronouns if is_accusative_pronoun(node)]
 
 
 def get_descendants(node: Dict[str, any]) -> List[Dict[str, any]]:
-    """Get all descendant nodes for a given node."""
-    if 'node' not in node:
-        return []
-    descendants = [n for n in node['node']]
-    for child in node['node']:
-        descendants += get_descendants(child)
+    """Get all descendant nodes for a given node. The children of each node are listed
+    before the descendants of those children."""
+    descendants = []
+    stack = [node]
+    while stack:
+        children = get_child_nodes(stack.pop())
+        descendants.extend(children)
+        stack.extend(reversed(children))
     return descendants
 
 
+def get_first_descendant_by_rel(node: Dict[str, any], rels: Iterable[str]) -> Union[None, Dict[str, any]]:
+    """Return the first descendant of a given node with the first of the given relations
+    that occurs among the descendants."""
+    descendants = get_descendants(node)
+    for rel in rels:
+        for desc in descendants:
+            if desc['@rel'] == rel:
+                return desc
+    return None
+
+
+def resolve_reference_node(node: Union[None, Dict[str, any]],
+                           nodes: Dict[int, Dict[str, any]]) -> Union[None, Dict[str, any]]:
+    """Return the referent node if a given node is a reference node, otherwise the node itself."""
+    if node is not None and is_reference_node(node):
+        return get_referent_node(node, nodes)
+    return node
+
+
 def get_descendant_words(node: Dict[str, any], nodes: Dict[int, Dict[str, any]]) -> List[Dict[str, any]]:
     """Return a list of nodes that are descendants of a given node."""
+    cache = nodes.descendant_words if isinstance(nodes, NodeIndex) else None
+    if cache is not None and node['@id'] in cache:
+        return list(cache[node['@id']])
+    node_id = node['@id']
     if is_reference_node(node):
-        for node_id in nodes:
-            n = nodes[node_id]
-            if is_referent_node(n, node):
-                node = n
-                break
+        referent = get_referent_node(node, nodes)
+        if referent is not None:
+            node = referent
     if '@word' in node:
-        return [node]
-    if 'node' not in node:
-        return []
+        words = [node]
+    elif 'node' not in node:
+        words = []
     else:
-        return [n for n in get_descendants(node) if '@word' in n]
+        words = [n for n in get_descendants(node) if '@word' in n]
+    if cache is not None:
+        cache[node_id] = words
+        return list(words)
+    return words
 
 
 def get_subject(node: Dict[str, any], nodes: Dict[int, Dict[str, any]]) -> Union[None, Dict[str, any]]:
@@ -219,7 +378,7 @@ def get_subject(node: Dict[str, any], nodes: Dict[int, Dict[str, any]]) -> Union
     if node['@rel'] == 'su':
         sub_node = node
     elif 'node' in node:
-        for child in node['node']:
+        for child in get_child_nodes(node):
             if child['@rel'] == 'su':
                 sub_node = child
     # Second, check if the node is a reference node and
@@ -235,41 +394,29 @@ def get_direct_object(node: Dict[str, any], nodes: Dict[int, Dict[str, any]]) ->
     obj_node = None
     # First find the node with the relation obj1 (direct object) or 'predc' (predicative complement)
     # It's either the node itself or one of it's direct children
-    if node['@rel'].startswith('obj') or node['@rel'] == 'predc':
+    rel = node['@rel']
+    if rel.startswith('obj') or rel == 'predc':
         obj_node = node
     elif 'node' in node:
-        for child in node['node']:
-            if child['@rel'] == 'obj1':
+        predc_child = None
+        # a verb clause that may contain an object if there is no direct obj or pred. complement
+        object_clause = None
+        for child in get_child_nodes(node):
+            child_rel = child['@rel']
+            if child_rel == 'obj1':
                 obj_node = child
                 break
+            if child_rel == 'predc' and predc_child is None:
+                predc_child = child
+            if object_clause is None and (child_rel == 'pc' or is_main_verbal(child)):
+                object_clause = child
         if obj_node is None:
-            # if there is no explicit direct object, look for a predicate complement
-            for child in node['node']:
-                if child['@rel'] == 'predc':
-                    obj_node = child
-                    break
-        if obj_node is None:
-            # there is no direct obj or pred. complement, so look for a verb clause that
-            # may contain an object
-            for child in node['node']:
-                if is_main_verbal(child) or child['@rel'] == 'pc':
-                    descendants = get_descendants(child)
-                    for desc in descendants:
-                        if desc['@rel'] == 'obj1':
-                            obj_node = desc
-                            break
-                    if obj_node is None:
-                        # if there is no explicit direct object, look for a predicate complement
-                        for desc in descendants:
-                            if desc['@rel'] == 'predc':
-                                obj_node = desc
-                                break
-                    break
+            obj_node = predc_child
+        if obj_node is None and object_clause is not None:
+            obj_node = get_first_descendant_by_rel(object_clause, ('obj1', 'predc'))
     # Second, check if the node is a reference node and
     # if so, find it's referent node
-    if obj_node is not None and is_reference_node(obj_node):
-        obj_node = get_referent_node(obj_node, nodes)
-    return obj_node
+    return resolve_reference_node(obj_node, nodes)
 
 
 def get_indirect_object(node: Dict[str, any], nodes: Dict[int, Dict[str, any]]) -> Union[None, Dict[str, any]]:
@@ -277,29 +424,22 @@ def get_indirect_object(node: Dict[str, any], nodes: Dict[int, Dict[str, any]])
     obj_node = None
     # First find the node with the relation obj2 (indirect object)
     # It's either the node itself or one of it's direct children
-    if node['@rel'] == ['obj2']:
+    if node.get('@rel') == 'obj2':
         obj_node = node
     elif 'node' in node:
-        for child in node['node']:
+        # a verb clause that may contain an object if there is no indirect object child
+        main_verbal_child = None
+        for child in get_child_nodes(node):
             if child['@rel'] == 'obj2':
                 obj_node = child
                 break
-        if obj_node is None:
-            # there is no direct obj or pred. complement, so look for a verb clause that
-            # may contain an object
-            for child in node['node']:
-                if is_main_verbal(child):
-                    descendants = get_descendants(child)
-                    for desc in descendants:
-                        if desc['@rel'] == 'obj2':
-                            obj_node = desc
-                            break
-                    break
+            if main_verbal_child is None and is_main_verbal(child):
+                main_verbal_child = child
+        if obj_node is None and main_verbal_child is not None:
+            obj_node = get_first_descendant_by_rel(main_verbal_child, ('obj2',))
     # Second, check if the node is a reference node and
     # if so, find it's referent node
-    if obj_node is not None and is_reference_node(obj_node):
-        obj_node = get_referent_node(obj_node, nodes)
-    return obj_node
+    return resolve_reference_node(obj_node, nodes)
 
 
 def get_relative_head_referent(node: Dict[str, any], nodes: Dict[int, Dict[str, any]],
@@ -307,15 +447,13 @@ def get_relative_head_referent(node: Dict[str, any], nodes: Dict[int, Dict[str,
     """Return the referent node for a given relative head node."""
     if node['@rel'] != 'rhd':
         return None
-    # parent = nodes[inverse_tree[node['@id']]]
     parent = node
-    phrase_types = {'np', 'ap'}
-    while parent is not None and parent['@cat'] not in phrase_types and parent['@id'] in inverse_tree:
-        parent = nodes[inverse_tree[parent['@id']]]
-    if parent and parent['@cat'] in phrase_types:
-        return parent
-    else:
-        return None
+    while parent.get('@cat') not in RELATIVE_HEAD_PHRASE_TAGS:
+        parent_id = inverse_tree.get(parent['@id'])
+        if parent_id is None:
+            return None
+        parent = nodes[parent_id]
+    return parent
 
 
 def get_finite_verb(node: Dict[str, any]) -> Dict[str, any]:
@@ -326,7 +464,7 @@ def get_finite_verb(node: Dict[str, any]) -> Dict[str, any]:
     if is_finite_verb(node):
         fin_verb = node
     elif 'node' in node:
-        for child in node['node']:
+        for child in get_child_nodes(node):
             if is_finite_verb(child):
                 fin_verb = child
     return fin_verb
@@ -335,36 +473,42 @@ def get_finite_verb(node: Dict[str, any]) -> Dict[str, any]:
 def get_node_sent_parent(node: Dict[str, any], nodes: Dict[int, Dict[str, any]],
                          inverse_tree: Dict[int, int]) -> Union[None, Dict[str, any]]:
     """Return the most direct sentence-like ancestor node of a given node."""
-    parent = None
-    if node['@id'] not in inverse_tree:
-        return parent
-    parent = nodes[inverse_tree[node['@id']]]
-
-    while parent and not is_sent_node(parent) and parent['@id'] in inverse_tree:
-        parent = nodes[inverse_tree[parent['@id']]]
-    return parent if is_sent_node(parent) else None
+    parent_id = inverse_tree.get(node['@id'])
+    while parent_id is not None:
+        parent = nodes[parent_id]
+        if is_sent_node(parent):
+            return parent
+        parent_id = inverse_tree.get(parent_id)
+    return None
 
 
 def get_sent_verbs(node: Dict[str, any]) -> List[Dict[str, any]]:
     """Return a list of all verbs that belong directly under the sentence.
     Verbs in lower sentence-like nodes are ignored."""
+    if 'node' not in node:
+        return [node] if '@word' in node and node['@pos'] == 'verb' else []
     sent_verbs = []
-    if 'node' in node:
-        for child in node['node']:
-            if '@word' in child and child['@pos'] == 'verb':
-                sent_verbs.append(child)
-            elif is_sent_node(child):
-                # child is a sentence-like node, so ignore
-                continue
-            elif 'node' in child:
-                sent_verbs += get_sent_verbs(child)
-    elif '@word' in node and node['@pos'] == 'verb':
-        sent_verbs.append(node)
+    stack = list(reversed(get_child_nodes(node)))
+    while stack:
+        child = stack.pop()
+        if '@word' in child and child['@pos'] == 'verb':
+            sent_verbs.append(child)
+        elif is_sent_node(child):
+            # child is a sentence-like node, so ignore
+            continue
+        elif 'node' in child:
+            stack.extend(reversed(get_child_nodes(child)))
     return sent_verbs
 
 
-def get_main_verb(node: Dict[str, any]) -> Union[None, Dict[str, any]]:
-    """Return the main verb node for a given sentence node."""
+def get_main_verb(node: Dict[str, any],
+                  nodes: Dict[int, Dict[str, any]] = None) -> Union[None, Dict[str, any]]:
+    """Return the main verb node for a given sentence node. If the sentence nodes are
+    given as a NodeIndex, the main verb is looked up only once per node."""
+    cache = nodes.main_verbs if isinstance(nodes, NodeIndex) else None
+    if cache is not None and node['@id'] in cache:
+        return cache[node['@id']]
+    node_id = node['@id']
     # print('GETTING MAIN VERB', node['@id'], node['@cat'])
     main_verb = None
     head_verb = None
@@ -374,7 +518,7 @@ def get_main_verb(node: Dict[str, any]) -> Union[None, Dict[str, any]]:
     elif '@cat' in node and node['@rel'] == 'vc':
         main_verb = node
     elif 'node' in node:
-        for child in node['node']:
+        for child in get_child_nodes(node):
             # if '@cat' in child or '@word' in child:
             #    print('\tCHILD:', child['@rel'], child['@cat'] if '@cat' in child else child['@word'])
             if '@word' in child and child['@pos'] == 'verb' and child['@rel'] == 'hd':
@@ -393,18 +537,20 @@ def get_main_verb(node: Dict[str, any]) -> Union[None, Dict[str, any]]:
         main_verb = None
         # print('HEAD VERB IS:', head_verb['@word'] if head_verb else None)
         # print('MAIN VERB IS VC')
-        for child in node['node']:
+        for child in get_child_nodes(node):
             # print('\tVC CHILD:', child['@id'], child['@rel'], child['@word'] if '@word' in child else None)
             if '@word' in child and child['@pos'] == 'verb' and child['@rel'] == 'hd':
                 main_verb = child
                 break
         if main_verb is None:
-            for child in node['node']:
+            for child in get_child_nodes(node):
                 if child and '@cat' in child and child['@cat'] in MAIN_VERBAL_TAGS:
-                    main_verb = get_main_verb(child)
+                    main_verb = get_main_verb(child, nodes)
     if main_verb and '@word' not in main_verb and head_verb is not None:
         # print('RESTORING HEAD VERB TO MAIN VERB')
         main_verb = head_verb
+    if cache is not None:
+        cache[node_id] = main_verb
     return main_verb
 
 
@@ -416,34 +562,32 @@ def get_node_words(node: Dict[str, any], nodes: Dict[int, Dict[str, any]],
         return None
     elif '@word' in node:
         return node['@word']
-    elif node['@rel'] == 'rhd':
+    cache = nodes.node_words if isinstance(nodes, NodeIndex) else None
+    if cache is not None and node['@id'] in cache:
+        return cache[node['@id']]
+    if node['@rel'] == 'rhd':
         rhead = get_relative_head_referent(node, nodes, inverse_tree)
         if rhead:
-            word_nodes = [n for n in rhead['node'] if '@word' in n]
+            word_nodes = [n for n in get_child_nodes(rhead) if '@word' in n]
         else:
             print('REL HEAD REF:', node['@cat'], node['@id'])
             raise TypeError('No referent with appropriate phrase type found')
     elif 'node' in node:
-        word_nodes = [n for n in get_descendant_words(node, nodes) if '@word' in n]
-    return ' '.join([n['@word'] for n in sorted(word_nodes, key=lambda x: x['@begin'])])
+        word_nodes = get_descendant_words(node, nodes)
+    words = ' '.join([n['@word'] for n in sorted(word_nodes, key=itemgetter('@begin'))])
+    if cache is not None:
+        cache[node['@id']] = words
+    return words
 
 
-def get_sent_nodes(nodes: Dict[int, Dict[str, any]]) -> Union[None, Generator[Dict[str, any], None, None]]:
+def get_sent_nodes(nodes: Dict[int, Dict[str, any]]) -> List[Dict[str, any]]:
     """Return all nodes that have a sentence type as category from a given list of nodes"""
-    for node_id in nodes:
-        node = nodes[node_id]
-        if '@cat' in node and node['@cat'] in SENT_TAGS:
-            yield node
-    return None
+    return list(as_node_index(nodes).sent_nodes)
 
 
-def get_main_verbal_nodes(nodes: Dict[int, Dict[str, any]]) -> Union[None, Generator[Dict[str, any], None, None]]:
-    """Return all nodes that have a sentence type as category from a given list of nodes"""
-    for node_id in nodes:
-        node = nodes[node_id]
-        if '@cat' in node and node['@cat'] in MAIN_VERBAL_TAGS:
-            yield node
-    return None
+def get_main_verbal_nodes(nodes: Dict[int, Dict[str, any]]) -> List[Dict[str, any]]:
+    """Return all nodes that have a main verbal type as category from a given list of nodes"""
+    return list(as_node_index(nodes).main_verbal_nodes)
 
 
 def get_node_tag(node: Dict[str, any]) -> Union[None, str]:
@@ -455,21 +599,64 @@ def get_node_tag(node: Dict[str, any]) -> Union[None, str]:
 
 
 def get_sent_node_main_elements(nodes: Dict[int, Dict[str, any]]) -> List[Dict[str, any]]:
-    main_elements = []
-    for main_verbal_node in get_main_verbal_nodes(nodes):
-        verbal_elements = get_verbal_node_main_elements(main_verbal_node, nodes)
-        main_elements.append(verbal_elements)
-    return main_elements
+    nodes = as_node_index(nodes)
+    return [get_verbal_node_main_elements(main_verbal_node, nodes) for main_verbal_node in nodes.main_verbal_nodes]
 
 
 def get_verbal_node_main_elements(main_verbal_node, nodes: Dict[int, Dict[str, any]]) -> Dict[str, any]:
+    """Return the main elements of a given main verbal node. The subject, objects and finite verb
+    are found in a single pass over the children of the node, following the same rules as
+    get_subject, get_direct_object, get_indirect_object and get_finite_verb."""
+    subject = obj1_child = predc_child = obj2_child = finite_verb = None
+    # the first children that may contain a direct or indirect object
+    object_clause = main_verbal_child = None
+    for child in get_child_nodes(main_verbal_node):
+        rel = child['@rel']
+        if rel == 'su':
+            subject = child
+        elif rel == 'obj1' and obj1_child is None:
+            obj1_child = child
+        elif rel == 'predc' and predc_child is None:
+            predc_child = child
+        elif rel == 'obj2' and obj2_child is None:
+            obj2_child = child
+        if is_finite_verb(child):
+            finite_verb = child
+        if is_main_verbal(child):
+            if main_verbal_child is None:
+                main_verbal_child = child
+            if object_clause is None:
+                object_clause = child
+        elif rel == 'pc' and object_clause is None:
+            object_clause = child
+    node_rel = main_verbal_node['@rel']
+    if node_rel == 'su':
+        subject = main_verbal_node
+    if node_rel.startswith('obj') or node_rel == 'predc':
+        direct_object = main_verbal_node
+    elif obj1_child is not None:
+        direct_object = obj1_child
+    elif predc_child is not None:
+        direct_object = predc_child
+    elif object_clause is not None:
+        direct_object = get_first_descendant_by_rel(object_clause, ('obj1', 'predc'))
+    else:
+        direct_object = None
+    if node_rel == 'obj2':
+        indirect_object = main_verbal_node
+    else:
+        indirect_object = obj2_child
+    if indirect_object is None and main_verbal_child is not None:
+        indirect_object = get_first_descendant_by_rel(main_verbal_child, ('obj2',))
+    if is_finite_verb(main_verbal_node):
+        finite_verb = main_verbal_node
     return {
         "verbal_node": main_verbal_node,
-        "subject": get_subject(main_verbal_node, nodes),
-        "direct_object": get_direct_object(main_verbal_node, nodes),
-        "indirect_object": get_indirect_object(main_verbal_node, nodes),
-        "finite_verb": get_finite_verb(main_verbal_node),
-        "main_verb": get_main_verb(main_verbal_node),
+        "subject": resolve_reference_node(subject, nodes),
+        "direct_object": resolve_reference_node(direct_object, nodes),
+        "indirect_object": resolve_reference_node(indirect_object, nodes),
+        "finite_verb": finite_verb,
+        "main_verb": get_main_verb(main_verbal_node, nodes),
         "verb_nodes": get_sent_verbs(main_verbal_node)
     }
 
@@ -1,24 +1,38 @@
-import copy
 import json
 import re
 import datetime
 from collections import defaultdict
-from itertools import combinations
-from typing import Dict, List, Set, Union
+from dataclasses import dataclass
+from itertools import combinations, product
+from typing import Dict, Iterable, List, Set, Union
 
 
 CURRENT_YEAR = datetime.date.today().year
 
+# a year in square brackets at the start, a year at the end (optionally followed
+# by a closing bracket) or an open-ended year range
+PUBLICATION_YEAR_PATTERN = re.compile(r'\[(?P<bracketed>\d{4})]|.*(?P<final>\d{4})]?$|(?P<open_range>\d{4})-\.\.\.$')
+
+
+def get_record_dc(record: Dict[str, any]) -> Dict[str, any]:
+    """Return the Dublin Core data of an SRU record."""
+    return record['srw:recordData']['srw_dc:dc']
+
+
+def get_dc_field_list(dc_data: Dict[str, any], field: str) -> List[any]:
+    """Return the values of a DC field as a list, without changing the record.
+    A field with a single value is not stored as a list."""
+    if field not in dc_data:
+        return []
+    values = dc_data[field]
+    return values if isinstance(values, list) else [values]
+
 
 def get_record_field_values(record: Dict[str, any], field: str) -> Dict[str, Set[str]]:
-    dc_data = record['srw:recordData']['srw_dc:dc']
+    dc_data = get_record_dc(record)
     values = defaultdict(set)
-    if field not in dc_data:
-        return values
-    if isinstance(dc_data[field], dict):
-        dc_data[field] = [dc_data[field]]
     try:
-        for rec_id in dc_data[field]:
+        for rec_id in get_dc_field_list(dc_data, field):
             values[rec_id['@xsi:type']].add(rec_id['#text'])
     except KeyError:
         print('field:', field)
@@ -28,16 +42,14 @@ def get_record_field_values(record: Dict[str, any], field: str) -> Dict[str, Set
 
 
 def get_record_title(record: Dict[str, any]) -> Dict[str, str]:
-    dc_data = record['srw:recordData']['srw_dc:dc']
+    dc_data = get_record_dc(record)
     values = {}
     if 'dc:title' not in dc_data:
         return values
-    if isinstance(dc_data['dc:title'], dict):
-        dc_data['dc:title'] = [dc_data['dc:title']]
     if isinstance(dc_data['dc:title'], str):
         values['dcx:maintitle'] = dc_data['dc:title']
         return values
-    for rec_id in dc_data['dc:title']:
+    for rec_id in get_dc_field_list(dc_data, 'dc:title'):
         if '@xsi:type' in rec_id and '#text' in rec_id:
             values[rec_id['@xsi:type']] = rec_id['#text']
         elif '#text' in rec_id:
@@ -49,71 +61,49 @@ def get_record_title(record: Dict[str, any]) -> Dict[str, str]:
 
 
 def get_record_identifiers(record: Dict[str, any]) -> Dict[str, Set[str]]:
-    dc_data = record['srw:recordData']['srw_dc:dc']
+    dc_data = get_record_dc(record)
     identifiers = defaultdict(set)
-    if 'dc:identifier' not in dc_data:
-        return identifiers
-    if isinstance(dc_data['dc:identifier'], dict):
-        dc_data['dc:identifier'] = [dc_data['dc:identifier']]
-    for rec_id in dc_data['dc:identifier']:
+    for rec_id in get_dc_field_list(dc_data, 'dc:identifier'):
         identifiers[rec_id['@xsi:type']].add(rec_id['#text'])
     return identifiers
 
 
 def get_record_creators(record: Dict[str, any]) -> Dict[str, Set[str]]:
-    dc_data = copy.deepcopy(record['srw:recordData']['srw_dc:dc'])
+    dc_data = get_record_dc(record)
     creators = defaultdict(set)
     creator_types = {'dc:creator': 'aut', 'dc:contributor': 'contributor'}
     for field in creator_types:
-        if field not in dc_data:
-            return creators
-        if isinstance(dc_data[field], list) is False:
-            dc_data[field] = [dc_data[field]]
-        for rec_id in dc_data[field]:
+        for rec_id in get_dc_field_list(dc_data, field):
             if isinstance(rec_id, str):
                 rec_id = {'#text': rec_id}
             creator_type = rec_id['@dcx:role'] if '@dcx:role' in rec_id else creator_types[field]
-            try:
-                creators[creator_type].add(rec_id['#text'])
-            except TypeError:
-                print(record['srw:recordData']['srw_dc:dc'][field])
-                print(dc_data[field])
-                raise
+            creators[creator_type].add(rec_id['#text'])
     return creators
 
 
 def get_record_isbns(record: Dict[str, any]) -> List[str]:
-    dc_data = record['srw:recordData']['srw_dc:dc']
+    dc_data = get_record_dc(record)
     isbns = []
-    if 'dc:identifier' not in dc_data:
-        return isbns
-    if isinstance(dc_data['dc:identifier'], dict):
-        dc_data['dc:identifier'] = [dc_data['dc:identifier']]
-    for rec_id in dc_data['dc:identifier']:
+    for rec_id in get_dc_field_list(dc_data, 'dc:identifier'):
         if rec_id['@xsi:type'] == 'dcterms:ISBN':
             isbns.append(rec_id['#text'])
     return isbns
 
 
 def get_record_publication_year(record: Dict[str, any]) -> Union[int, None]:
-    if 'dc:date' not in record['srw:recordData']['srw_dc:dc']:
+    dc_data = get_record_dc(record)
+    if 'dc:date' not in dc_data:
         return None
+    date = dc_data['dc:date']
+    if len(date) == 4 and date.isdecimal():
+        # most dates are a bare year. isdigit would also accept characters like '²'
+        # that int can't parse
+        year = int(date)
     else:
-        date = record['srw:recordData']['srw_dc:dc']['dc:date']
-        if re.match(r'^\d{4}$', date):
-            year = date
-        elif m := re.match(r'\[(\d{4})]', date):
-            year = m.group(1)
-        elif m := re.match(r'.*(\d{4})$', date):
-            year = m.group(1)
-        elif m := re.match(r'.*(\d{4})]$', date):
-            year = m.group(1)
-        elif m := re.match(r'^(\d{4})-\.\.\.$', date):
-            year = m.group(1)
-        else:
+        m = PUBLICATION_YEAR_PATTERN.match(date)
+        if m is None:
             return None
-    if year.isdigit() and len(year) == 4:
-        year = int(year)
+        year = int(m.group(m.lastgroup))
     if 1500 <= year <= CURRENT_YEAR:
         return year
     return None
@@ -121,20 +111,16 @@ def get_record_publication_year(record: Dict[str, any]) -> Union[int, None]:
 
 def get_record_nurs(record: Dict[str, any]) -> List[int]:
     nurs = []
-    for rec_subject in record['srw:recordData']['srw_dc:dc']['dc:subject']:
+    for rec_subject in get_dc_field_list(get_record_dc(record), 'dc:subject'):
         if rec_subject['@xsi:type'] == 'dcx:NUR':
             nurs.append(int(rec_subject['#text']))
     return nurs
 
 
 def get_record_subjects(record: Dict[str, any]) -> Dict[str, Set[str]]:
-    dc_data = record['srw:recordData']['srw_dc:dc']
+    dc_data = get_record_dc(record)
     subjects = defaultdict(set)
-    if 'dc:subject' not in dc_data:
-        return subjects
-    if isinstance(dc_data['dc:subject'], dict):
-        dc_data['dc:subject'] = [dc_data['dc:subject']]
-    for rec_subject in dc_data['dc:subject']:
+    for rec_subject in get_dc_field_list(dc_data, 'dc:subject'):
         if '#text' not in rec_subject:
             continue
         subjects[rec_subject['@xsi:type']].add(rec_subject['#text'])
@@ -147,6 +133,44 @@ def get_ppn_ids(identifiers):
     return [id_uri.split('PPN:')[-1] for id_uri in identifiers['dcterms:URI'] if 'resolve?urn=PPN:' in id_uri]
 
 
+@dataclass
+class ParsedRecord:
+    identifiers: Dict[str, Set[str]]
+    isbns: List[str]
+    ppn_ids: List[str]
+    subjects: Dict[str, Set[str]]
+    creators: Dict[str, Set[str]]
+    title: Dict[str, str]
+    year: Union[int, None]
+
+
+def parse_record(record: Dict[str, any]) -> ParsedRecord:
+    """Parse the fields of a record that are used for the work graph. The identifiers
+    and ISBNs are collected in a single pass over the record identifiers."""
+    dc_data = get_record_dc(record)
+    identifiers = defaultdict(set)
+    isbns = []
+    try:
+        for rec_id in get_dc_field_list(dc_data, 'dc:identifier'):
+            id_type = rec_id['@xsi:type']
+            identifiers[id_type].add(rec_id['#text'])
+            if id_type == 'dcterms:ISBN':
+                isbns.append(rec_id['#text'])
+    except KeyError:
+        print('field:', 'dc:identifier')
+        print('dc_data:', dc_data['dc:identifier'])
+        raise
+    return ParsedRecord(
+        identifiers=identifiers,
+        isbns=isbns,
+        ppn_ids=get_ppn_ids(identifiers),
+        subjects=get_record_subjects(record),
+        creators=get_record_creators(record),
+        title=get_record_title(record),
+        year=get_record_publication_year(record),
+    )
+
+
 def init_attr_dict() -> Dict[str, any]:
     return {
         'type': 'isbn',
@@ -163,21 +187,24 @@ def make_isbn_node(isbn: str,
                    creators: Dict[str, Set[str]],
                    title: Dict[str, str], year: Union[str, int, float]):
     node_name = f"isbn__{isbn}"
-    attr_dict = init_attr_dict()
-    if year:
-        attr_dict['year'].add(year)
+    attr_dict = {
+        'type': 'isbn',
+        'nur': set(),
+        'year': {year} if year else set(),
+        'creator': set(),
+        'author': set(creators['aut']) if 'aut' in creators else set(),
+        'title': set(),
+    }
     for vocab in subjects:
         plain_vocab = vocab.split(':')[-1].lower()
-        attr_dict[plain_vocab] = subjects[vocab]
+        # copy, so ISBN nodes of the same record don't share a set
+        attr_dict[plain_vocab] = set(subjects[vocab])
     if 'dcx:maintitle' in title:
         if 'dcx:subtitle' in title:
             title = f"{title['dcx:maintitle']} -- {title['dcx:subtitle']}"
         else:
             title = title['dcx:maintitle']
         attr_dict['title'].add(title)
-    if 'aut' in creators:
-        for author in creators['aut']:
-            attr_dict['author'].add(author)
     # if isbn in has_subject:
     #     for vocab in has_subject[isbn]:
     #         plain_vocab = vocab.split(':')[-1].lower()
@@ -185,36 +212,42 @@ def make_isbn_node(isbn: str,
     return node_name, attr_dict
 
 
+def merge_node_attributes(existing: Dict[str, any], attr_dict: Dict[str, any]) -> None:
+    """Merge the attributes of a new node into those of an existing node with the same name."""
+    for attr, values in attr_dict.items():
+        bucket = existing.get(attr)
+        if bucket is None:
+            existing[attr] = set(values) if isinstance(values, set) else values
+        elif isinstance(bucket, set) and isinstance(values, set):
+            bucket.update(values)
+
+
+def add_records_nodes(work_graph, records: Iterable[Dict[str, any]]):
+    """Add the ISBN and PPN nodes and their links for a batch of records. The nodes
+    and edges of all records are collected first and added to the graph in one go."""
+    new_nodes = {}
+    edges = []
+    for record in records:
+        parsed = parse_record(record)
+        ppn_node_names = [f"ppn__{ppn_id}" for ppn_id in parsed.ppn_ids]
+        for node_name in ppn_node_names:
+            new_nodes[node_name] = {'type': 'ppn', 'nur': set()}
+        isbn_node_names = []
+        for isbn in parsed.isbns:
+            node_name, attr_dict = make_isbn_node(isbn, parsed.subjects, parsed.creators, parsed.title, parsed.year)
+            isbn_node_names.append(node_name)
+            # ISBN exists, don't make a new node but merge the attributes
+            if node_name in new_nodes:
+                merge_node_attributes(new_nodes[node_name], attr_dict)
+            elif node_name in work_graph.nodes:
+                merge_node_attributes(work_graph.nodes[node_name], attr_dict)
+            else:
+                new_nodes[node_name] = attr_dict
+        edges.extend(product(isbn_node_names, ppn_node_names))
+        edges.extend(combinations(isbn_node_names, 2))
+    work_graph.add_nodes_from(new_nodes.items())
+    work_graph.add_edges_from(edges)
+
+
 def add_record_nodes(work_graph, record):
-    isbns = get_record_isbns(record)
-    subjects = get_record_subjects(record)
-    identifiers = get_record_field_values(record, 'dc:identifier')
-    creators = get_record_creators(record)
-    title = get_record_title(record)
-    # print('title:', title)
-    ppn_ids = get_ppn_ids(identifiers)
-    ppn_node_names = [f"ppn__{ppn_id}" for ppn_id in ppn_ids]
-    year = get_record_publication_year(record)
-    for node_name in ppn_node_names:
-        work_graph.add_node(node_name, **{'type': 'ppn', 'nur': set()})
-    for isbn in isbns:
-        isbn_node, attr_dict = make_isbn_node(isbn, subjects, creators, title, year)
-        node_name = f"isbn__{isbn}"
-        if node_name in work_graph.nodes:
-            # print("ISBN exists, don't make a new node!")
-            # print(attr_dict)
-            # print(work_graph.nodes[node_name])
-            # print('\n')
-            for attr in attr_dict:
-                if attr not in work_graph.nodes[node_name]:
-                    work_graph.nodes[node_name][attr] = set()
-                    for attr_value in attr_dict[attr]:
-                        work_graph.nodes[node_name][attr].add(attr_value)
-        else:
-            work_graph.add_node(isbn_node, **attr_dict)
-        for ppn_node in ppn_node_names:
-            work_graph.add_edge(isbn_node, ppn_node)
-    for isbn1, isbn2 in combinations(isbns, 2):
-        isbn1_node = f"isbn__{isbn1}"
-        isbn2_node = f"isbn__{isbn2}"
-        work_graph.add_edge(isbn1_node, isbn2_node)
+    add_records_nodes(work_graph, [record])
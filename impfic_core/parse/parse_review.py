@@ -1,15 +1,23 @@
 import gzip
 import json
 import os
-import re
 from collections import defaultdict
+from functools import lru_cache
+from typing import Generator, Iterable, List, Tuple, Union
 
 import ast
+import csv
 import hashlib
 
+import pandas as pd
+
 from impfic_core.secrets import salt as secret_salt
 
+SECRET_SALT_BYTES = secret_salt.encode()
+
+# quoted spans are found by find_quote_spans, which matches this pattern
 QUOTE_PATTERN = r'''(["'].*?["'])'''
+QUOTE_CHARS = ('"', "'")
 
 
 USER_HASH_MAP_FILE = '../../data/mappings/user_names/user_hash_map.json'
@@ -31,6 +39,15 @@ def read_work_isbn_genre(genre_file: str):
     return None
 
 
+@lru_cache(maxsize=100_000)
+def parse_genre_list(genre_value: str) -> Tuple[any, ...]:
+    """Parse a serialised list of genre codes from the work genre map. Many works share
+    the same genre list, so each distinct string is only evaluated once."""
+    if genre_value == '':
+        return ()
+    return tuple(ast.literal_eval(genre_value))
+
+
 def read_work_id_map(work_id_map_file: str = None):
     if work_id_map_file is None:
         work_id_map_file = WORK_ID_MAP_FILE
@@ -42,18 +59,15 @@ def read_work_id_map(work_id_map_file: str = None):
         'nur', 'thema', 'bisac', 'brinkman', 'unesco'
     ]
 
-    for work_isbn_genre in read_work_isbn_genre(work_id_map_file):
-        book_id = work_isbn_genre['record_id']
-        book_id_type = work_isbn_genre['record_id_type']
-        work_id = work_isbn_genre['work_id']
+    # read the whole file with the C parser, keeping all values as plain strings like read_work_isbn_genre
+    work_isbn_genre = pd.read_csv(work_id_map_file, sep='\t', compression='gzip', dtype=str,
+                                  keep_default_na=False, quoting=csv.QUOTE_NONE)
+    columns = ['record_id', 'record_id_type', 'work_id'] + genre_fields
+    for book_id, book_id_type, work_id, *genre_values in work_isbn_genre[columns].itertuples(index=False, name=None):
         book_has_work_id[f"{book_id_type}__{book_id}"] = work_id
         work_has_book_id[work_id][book_id] = book_id_type
-        for vocab in genre_fields:
-            if work_isbn_genre[vocab] == '':
-                genres = []
-            else:
-                genres = ast.literal_eval(work_isbn_genre[vocab])
-            for genre in genres:
+        for vocab, genre_value in zip(genre_fields, genre_values):
+            for genre in parse_genre_list(genre_value):
                 work_has_genre[work_id][vocab].add(genre)
     return book_has_work_id, work_has_book_id, work_has_genre
 
@@ -119,62 +133,85 @@ def read_user_maps(user_hash_map_file: str = None, user_id_map_file: str = None)
 
 def hash_reviewer_id(reviewer_id: str, collection_id: str = None,
                      collection_prefix: str = '__', salt: str = None):
-    if salt is None:
-        salt = secret_salt
-    if isinstance(reviewer_id, str) is False:
+    if not isinstance(reviewer_id, str):
         return reviewer_id
-    reviewer_string = str(reviewer_id)
+    salt_bytes = SECRET_SALT_BYTES if salt is None else salt.encode()
+    reviewer_string = reviewer_id
     if collection_id is not None:
         reviewer_string = f"{reviewer_string}{collection_prefix}{collection_id}"
-    try:
-        return hashlib.sha512(reviewer_string.encode() + salt.encode()).hexdigest()
-    except AttributeError:
-        print(f'reviewer_id #{reviewer_id}#')
-        print(f'reviewer_string #{reviewer_string}#')
-    raise
+    return hashlib.sha512(reviewer_string.encode() + salt_bytes).hexdigest()
+
+
+def hash_reviewer_ids(reviewer_ids: Iterable[str], collection_id: str = None,
+                      collection_prefix: str = '__', salt: str = None) -> List[str]:
+    """Hash a sequence of reviewer IDs in one go. The salt and collection suffix are
+    encoded once for the whole sequence instead of once per ID."""
+    salt_bytes = SECRET_SALT_BYTES if salt is None else salt.encode()
+    suffix = b'' if collection_id is None else f"{collection_prefix}{collection_id}".encode()
+    sha512 = hashlib.sha512
+    return [sha512(reviewer_id.encode() + suffix + salt_bytes).hexdigest()
+            if isinstance(reviewer_id, str) else reviewer_id
+            for reviewer_id in reviewer_ids]
 
 
 def get_sentences(review):
     return review['sentences'] if 'sentences' in review else review['parsed_text']['sentences']
 
 
-def get_user_id(review, user_id_map, add_unseen: bool = False):
-    if 'user_id' in review:
-        user_string = review['user_id']
-    elif 'review_author_url' in review:
-        user_string = review['review_author_url']
-    elif 'reviewer_id' in review:
-        user_string = review['reviewer_id']
-    else:
-        raise KeyError(f"no user id property found in review {review['review_id']}")
+# review properties that can hold the user or review ID, in order of priority
+USER_ID_FIELDS = ('user_id', 'review_author_url', 'reviewer_id')
+REVIEW_ID_FIELDS = ('review_id', 'reviewid', 'review_url')
+
+
+def get_user_id_field(review) -> Union[None, str]:
+    """Return the property that holds the user ID of a review. For reviews from a
+    single source, this can be determined once and passed to get_user_id."""
+    for field in USER_ID_FIELDS:
+        if field in review:
+            return field
+    return None
+
+
+def get_review_id_field(review) -> Union[None, str]:
+    """Return the property that holds the review ID of a review. For reviews from a
+    single source, this can be determined once and passed to get_review_id."""
+    for field in REVIEW_ID_FIELDS:
+        if field in review:
+            return field
+    return None
+
+
+def get_user_id(review, user_id_map, add_unseen: bool = False, user_id_field: str = None):
+    if user_id_field is None:
+        user_id_field = get_user_id_field(review)
+        if user_id_field is None:
+            raise KeyError(f"no user id property found in review {review['review_id']}")
+    user_string = review[user_id_field]
     if user_string.startswith('impfic-user-'):
         return user_string
     elif user_string.startswith('impfic-'):
         raise ValueError(f'Non-user_id found as impfic user_id: {user_string}')
     if user_string not in user_id_map:
-        if add_unseen is True:
+        if add_unseen:
             user_id_map[user_string] = f"impfic-user-{len(user_id_map) + 1}"
         else:
             return None
     return user_id_map[user_string]
 
 
-def get_review_id(review, review_id_map, add_unseen: bool = False):
-    if 'review_id' in review:
-        review_string = review['review_id']
-    elif 'reviewid' in review:
-        review_string = review['reviewid']
-    elif 'review_url' in review:
-        review_string = review['review_url']
-    else:
-        print(review)
-        raise KeyError(f"no review id property found in review.")
+def get_review_id(review, review_id_map, add_unseen: bool = False, review_id_field: str = None):
+    if review_id_field is None:
+        review_id_field = get_review_id_field(review)
+        if review_id_field is None:
+            print(review)
+            raise KeyError(f"no review id property found in review.")
+    review_string = review[review_id_field]
     if review_string.startswith('impfic-review-'):
         return review['review_id']
     elif review_string.startswith('impfic-'):
         raise ValueError(f'Non-review_id found as impfic review_id: {review_string}')
     if review_string not in review_id_map:
-        if add_unseen is True:
+        if add_unseen:
             review_id_map[review_string] = f"impfic-review-{len(review_id_map) + 1}"
         else:
             print(f'review_string {review_string} not in review_id_map')
@@ -220,7 +257,7 @@ def get_ids(review, review_id_map, user_id_map, book_has_work_id):
 
 
 def normalise_hebban_review_url(url):
-    if isinstance(url, str) is False:
+    if not isinstance(url, str):
         return url
     if 'hebban.nl/' not in url:
         return url
@@ -240,14 +277,14 @@ def get_doc_sentences(doc):
 def get_num_words(doc):
     num_words = 0
     for sent in get_doc_sentences(doc):
-        num_words += len([t for t in sent['tokens'] if t['upos'] != 'PUNCT'])
+        num_words += sum(1 for t in sent['tokens'] if t['upos'] != 'PUNCT')
     return num_words
 
 
 def get_num_terms(doc):
     num_terms = 0
     for sent in get_doc_sentences(doc):
-        num_terms += len([t for t in sent['tokens']])
+        num_terms += len(sent['tokens'])
     return num_terms
 
 
@@ -255,7 +292,7 @@ def read_jsonl_reviews(review_file):
     nbd_review_num = 0
     with gzip.open(review_file['file'], 'rt') as fh:
         for line in fh:
-            review = json.loads(line.strip())
+            review = json.loads(line)
             if 'source' not in review:
                 review['source'] = review_file['source']
             if review['source'] == 'nbd_biblion':
@@ -264,26 +301,51 @@ def read_jsonl_reviews(review_file):
             yield review
 
 
+def find_quote_spans(text: str) -> Generator[Tuple[int, int], None, None]:
+    """Yield the start and end offsets of the quoted spans in a text, i.e. the non-overlapping
+    matches of QUOTE_PATTERN: a single or double quote up to the next single or double quote
+    on the same line. Each quote character is looked up with str.find, and each search only
+    moves forward, so the text is scanned once."""
+    next_pos = {char: text.find(char) for char in QUOTE_CHARS}
+
+    def next_quote(pos: int) -> int:
+        nearest = -1
+        for char in QUOTE_CHARS:
+            idx = next_pos[char]
+            if -1 < idx < pos:
+                idx = next_pos[char] = text.find(char, pos)
+            if idx != -1 and (nearest == -1 or idx < nearest):
+                nearest = idx
+        return nearest
+
+    pos = 0
+    while True:
+        start = next_quote(pos)
+        if start == -1:
+            return None
+        end = next_quote(start + 1)
+        if end == -1:
+            return None
+        if text.find('\n', start + 1, end) != -1:
+            # the quote is not closed on the same line, try again from the next quote
+            pos = end
+            continue
+        yield start, end + 1
+        pos = end + 1
+
+
 def has_quote(review):
     review_text = review["text"] if "text" in review else review["review_text"]
-    for match in re.finditer(QUOTE_PATTERN, review_text):
-        if len(match.group(1)) > 40:
-            return True
-    else:
-        return False
+    return any(end - start > 40 for start, end in find_quote_spans(review_text))
 
 
 def split_on_quotes(review):
     quotes = []
     review_text = review["text"] if "text" in review else review["review_text"]
-    for match in re.finditer(QUOTE_PATTERN, review_text):
-        if len(match.group(1)) > 40:
-            quote_string = match.group(1)
-            quote_offset = match.start()
-            quotes.append({"offset": quote_offset, "end": quote_offset + len(match.group(1)), "text": match.group(1),
+    for quote_offset, quote_end in find_quote_spans(review_text):
+        if quote_end - quote_offset > 40:
+            quotes.append({"offset": quote_offset, "end": quote_end, "text": review_text[quote_offset:quote_end],
                            "is_quote": True})
-        # else:
-        #    print(match.start(), match.group(1))
     review["split_text"] = []
     full_text = review_text
     for quote in quotes[::-1]:
@@ -1,5 +1,6 @@
 from typing import Dict, Generator, List, Tuple, Union
 from collections import defaultdict
+from dataclasses import dataclass, field
 
 import impfic_core.pattern.tag_sets_en as tag_sets
 
@@ -17,59 +18,119 @@ def group_tokens_by_head(tokens: Dict[int, Dict[str, any]]) -> Dict[int, List[Di
     return head_group
 
 
-def get_head_verb_id(head_id: int, tokens: Dict[int, Dict[str, any]]) -> int:
+def get_head_verb_id(head_id: int, tokens: Dict[int, Dict[str, any]],
+                     head_verb_cache: Dict[int, int] = None) -> int:
     """Return the id of the head verb of a set of tokens for a given head id,
-    or 0 if the head id is 0."""
-    if head_id == 0:
-        return 0
-    head_token = tokens[head_id]
-    if 'upos' in head_token and 'deprel' not in head_token:
-        print(head_token)
-    if head_token['upos'] in tag_sets.VERB_POS and 'deprel' in head_token \
-            and head_token['deprel'] not in tag_sets.NON_HEAD_VERB_DEPRELS:
-        return head_token['id']
+    or 0 if the head id is 0.
+
+    The head chain is followed iteratively. If a head_verb_cache is given, the
+    head verb of every token id on the chain is stored in it, so that the chains
+    of other tokens in the same sentence can stop at the first cached id."""
+    if head_verb_cache is None:
+        head_verb_cache = {}
+    verb_pos, non_head_verb_deprels = tag_sets.VERB_POS, tag_sets.NON_HEAD_VERB_DEPRELS
+    path = []
+    while head_id != 0 and head_id not in head_verb_cache:
+        if len(path) > len(tokens):
+            print('head chain:', path)
+            raise ValueError(f"cycle in the head chain of token {path[0]}")
+        head_token = tokens[head_id]
+        if 'upos' in head_token and 'deprel' not in head_token:
+            print(head_token)
+        if head_token['upos'] in verb_pos and 'deprel' in head_token \
+                and head_token['deprel'] not in non_head_verb_deprels:
+            head_verb_id = head_token['id']
+            break
+        path.append(head_id)
+        head_id = head_token['head']
     else:
-        return get_head_verb_id(head_token['head'], tokens)
+        head_verb_id = head_verb_cache.get(head_id, 0)
+    for token_id in path:
+        head_verb_cache[token_id] = head_verb_id
+    return head_verb_id
 
 
 def group_tokens_by_head_verb(tokens: Dict[int, Dict[str, any]]) -> Dict[int, List[Dict[str, any]]]:
     """Group a list of tokens by their head verb tokens."""
     head_group = group_tokens_by_head(tokens)
     head_verb_group = defaultdict(list)
+    # the ids of the tokens in each head verb group, to check membership by id
+    head_verb_group_ids = defaultdict(set)
+    head_verb_cache = {}
+    verb_pos, non_head_verb_deprels = tag_sets.VERB_POS, tag_sets.NON_HEAD_VERB_DEPRELS
     for head_id in head_group:
-        head_verb_id = get_head_verb_id(head_id, tokens)
+        head_verb_id = get_head_verb_id(head_id, tokens, head_verb_cache)
         for token in head_group[head_id]:
-            if token['id'] in head_group and token['upos'] in tag_sets.VERB_POS \
-                    and 'deprel' in token and token['deprel'] not in tag_sets.NON_HEAD_VERB_DEPRELS:
-                if token not in head_verb_group[token['id']]:
-                    # print('HEAD VERB:', token['id'], token['text'], token['deprel'])
-                    head_verb_group[token['id']].append(token)
-            elif token not in head_verb_group[head_verb_id]:
-                head_verb_group[head_verb_id].append(token)
+            token_id = token['id']
+            if token_id in head_group and token['upos'] in verb_pos \
+                    and 'deprel' in token and token['deprel'] not in non_head_verb_deprels:
+                group_id = token_id
+                # print('HEAD VERB:', token['id'], token['text'], token['deprel'])
+            else:
+                group_id = head_verb_id
+            if token_id not in head_verb_group_ids[group_id]:
+                head_verb_group_ids[group_id].add(token_id)
+                head_verb_group[group_id].append(token)
     head_verb_group = copy_subject_across_conjunctions(head_verb_group)
     return head_verb_group
 
 
 def copy_subject_across_conjunctions(head_verb_group: Dict[int, List[Dict[str, any]]]) -> Dict[int, List[Dict[str, any]]]:
+    subs = tag_sets.SUBS
+    # collect the subjects and the head token of each group in a single pass
+    group_subjs = {}
+    head_tokens = {}
     for head_id in head_verb_group:
-        if head_id == 0:
-            continue
+        subjs = []
         for t in head_verb_group[head_id]:
             if 'deprel' not in t:
-                print('MISSING DEPREL:', t)
-        subjs = [t for t in head_verb_group[head_id] if
-                 'deprel' in t and t['deprel'] in {'nsubj', 'csubj', 'nsubj:pass'}]
-        if len(subjs) == 0:
-            head_token = [t for t in head_verb_group[head_id] if t['id'] == head_id][0]
-            connected_group_id = head_token['head']
+                if head_id != 0:
+                    print('MISSING DEPREL:', t)
+            elif t['deprel'] in subs:
+                subjs.append(t)
+            if t['id'] == head_id:
+                head_tokens[head_id] = t
+        group_subjs[head_id] = subjs
+    for head_id in head_verb_group:
+        if head_id == 0:
+            continue
+        if len(group_subjs[head_id]) == 0:
+            connected_group_id = head_tokens[head_id]['head']
             if connected_group_id not in head_verb_group:
                 continue
-            connected_subjs = [t for t in head_verb_group[connected_group_id] if
-                               t['deprel'] in {'nsubj', 'csubj', 'nsubj:pass'}]
+            connected_subjs = list(group_subjs[connected_group_id])
             head_verb_group[head_id].extend(connected_subjs)
+            group_subjs[head_id].extend(connected_subjs)
     return head_verb_group
 
 
+@dataclass
+class SentenceView:
+    """A trankit sentence with its token dictionary and head verb groups. Both are
+    computed on first use, so that several getters can be called on the same sentence
+    without grouping the tokens again. The sentence should not change after that."""
+    sent: Union[List[Dict[str, any]], Dict[str, any]]
+    _tokens: Dict[int, Dict[str, any]] = field(default=None, init=False, repr=False)
+    _head_verb_group: Dict[int, List[Dict[str, any]]] = field(default=None, init=False, repr=False)
+
+    @property
+    def tokens(self) -> Dict[int, Dict[str, any]]:
+        if self._tokens is None:
+            self._tokens = token_list_to_dict(self.sent)
+        return self._tokens
+
+    @property
+    def head_verb_group(self) -> Dict[int, List[Dict[str, any]]]:
+        if self._head_verb_group is None:
+            self._head_verb_group = group_tokens_by_head_verb(self.tokens)
+        return self._head_verb_group
+
+
+def analyze_sentence(sent: Union[Dict[str, any], SentenceView]) -> SentenceView:
+    """Return the given sentence as a SentenceView, wrapping it if it is a sentence dictionary."""
+    return sent if isinstance(sent, SentenceView) else SentenceView(sent)
+
+
 def get_pronoun_info(pron_token: Dict[str, any]) -> Dict[str, any]:
     # person_fields = 'pt', 'vw_type', 'pos', 'case', 'status', 'person', 'card', 'genus'
     # seven_fields 'pt', 'vw_type', 'pos', 'case', 'status', 'person', 'card'
@@ -101,10 +162,9 @@ def get_pronouns(sent: Dict[str, any]) -> List[Dict[str, any]]:
     return pronouns
 
 
-def get_verbs(sent: Dict[str, any]) -> List[Dict[str, any]]:
+def get_verbs(sent: Union[Dict[str, any], SentenceView]) -> List[Dict[str, any]]:
     verbs = []
-    tokens = token_list_to_dict(sent)
-    verb_groups = group_tokens_by_head_verb(tokens)
+    verb_groups = analyze_sentence(sent).head_verb_group
     for head_id in verb_groups:
         for token in verb_groups[head_id]:
             if token['upos'] in tag_sets.VERB_POS:
@@ -146,10 +206,9 @@ def prep_tokens(sent: Dict[str, any]):
     return {token['id']: token for token in sent[word_field]}
 
 
-def get_verb_clauses(sent: Dict[str, any]) -> List[List[Dict[str, any]]]:
+def get_verb_clauses(sent: Union[Dict[str, any], SentenceView]) -> List[Dict[str, any]]:
     """Return all clausal units in the sentence that contain a head verb."""
-    tokens = token_list_to_dict(sent)
-    head_group = group_tokens_by_head_verb(tokens)
+    head_group = analyze_sentence(sent).head_verb_group
     clauses = []
     for head_id in sorted(head_group):
         clause = {
@@ -160,29 +219,31 @@ def get_verb_clauses(sent: Dict[str, any]) -> List[List[Dict[str, any]]]:
     return clauses
 
 
-def get_verb_clusters(sent: Dict[str, any]):
+def get_verb_clusters(sent: Union[Dict[str, any], SentenceView]):
     """Return all verbs per clausal unit in the sentence that contains a head verb."""
     verb_clauses = get_verb_clauses(sent)
     verb_clusters = []
     for clause in verb_clauses:
-        verbs = [token for token in clause if token['upos'] in tag_sets.VERB_POS]
+        verbs = [token for token in clause['tokens'] if token['upos'] in tag_sets.VERB_POS]
         if len(verbs) > 0:
             verb_clusters.append(verbs)
     return verb_clusters
 
 
-def get_subject_object_verb_clusters(sent: Dict[str, any]):
-    tokens = token_list_to_dict(sent)
-    head_group = group_tokens_by_head_verb(tokens)
+def get_subject_object_verb_clusters(sent: Union[Dict[str, any], SentenceView]):
+    head_group = analyze_sentence(sent).head_verb_group
     clusters = []
+    subs, objs, verb_pos = tag_sets.SUBS, tag_sets.OBJS, tag_sets.VERB_POS
     for head_id in head_group:
-        cluster = {
-            'subject': [token for token in head_group[head_id]
-                        if 'deprel' in token and token['deprel'] in tag_sets.SUBS],
-            'object': [token for token in head_group[head_id]
-                       if 'deprel' in token and token['deprel'] in tag_sets.OBJS],
-            'verbs': [token for token in head_group[head_id] if token['upos'] in tag_sets.VERB_POS]
-        }
+        cluster = {'subject': [], 'object': [], 'verbs': []}
+        for token in head_group[head_id]:
+            if 'deprel' in token:
+                if token['deprel'] in subs:
+                    cluster['subject'].append(token)
+                if token['deprel'] in objs:
+                    cluster['object'].append(token)
+            if token['upos'] in verb_pos:
+                cluster['verbs'].append(token)
         if len(cluster['verbs']) > 0:
             clusters.append(cluster)
     return clusters
@@ -201,17 +262,20 @@ def token_list_to_dict(tokens: Union[List[Dict[str, any]], Dict[str, any]]) -> D
         raise TypeError(f"invalid type for tokens, must be list of tokens of sentence dictionary.")
 
 
-def get_pronoun_verb_pairs(sent: Dict[str, any]) -> Generator[Tuple[Dict[str, any], Dict[str, any]], None, None]:
-    tokens = token_list_to_dict(sent)
-    head_group = group_tokens_by_head_verb(tokens)
+def get_pronoun_verb_pairs(sent: Union[Dict[str, any], SentenceView]) -> Generator[Tuple[Dict[str, any], Dict[str, any]], None, None]:
+    head_group = analyze_sentence(sent).head_verb_group
+    sub_objs, verb_pos = tag_sets.SUB_OBJS, tag_sets.VERB_POS
     for head_id in head_group:
         # print(head_id)
         # for token in sorted(head_group[head_id], key = lambda x: x['id']):
         #    print('\t', token['id'], token['text'], token['upos'], token['deprel'], token['head'])
-        sub_objs = [token for token in head_group[head_id]
-                    if 'deprel' in token and token['deprel'] in tag_sets.SUB_OBJS]
-        verbs = [token for token in head_group[head_id] if token['upos'] in tag_sets.VERB_POS]
-        pron_sub_objs = [token for token in sub_objs if is_person_pronoun(token)]
+        pron_sub_objs = []
+        verbs = []
+        for token in head_group[head_id]:
+            if 'deprel' in token and token['deprel'] in sub_objs and is_person_pronoun(token):
+                pron_sub_objs.append(token)
+            if token['upos'] in verb_pos:
+                verbs.append(token)
         if len(verbs) == 0:
             continue
         for sub_obj in pron_sub_objs:
@@ -23,7 +23,7 @@ class Pattern:
     #######################
 
     def is_punct(self, token: Token) -> bool:
-        return token.text in punctuation or all([char in punctuation for char in token.text])
+        return token.text in punctuation or all(char in punctuation for char in token.text)
 
     def is_subject(self, token: Token) -> bool:
         return token.deprel in self.tag_sets.SUBS
@@ -100,13 +100,13 @@ class Pattern:
         return [token for token in sequence_to_list(sequence) if token.upos == 'PRON']
 
     def has_aux_past(self, sequence: Union[Sentence, Clause, List[Token]]):
-        if any(self.is_past_tense(token) for token in sequence) is True:
+        if any(self.is_past_tense(token) for token in sequence):
             return any(self.is_perfect_aux(token) for token in sequence)
         else:
             return False
 
     def has_aux_present(self, sequence: Union[Sentence, Clause, List[Token]]):
-        if any(self.is_present_tense(token) for token in sequence) is True:
+        if any(self.is_present_tense(token) for token in sequence):
             return any(self.is_perfect_aux(token) for token in sequence)
         else:
             return False
@@ -227,7 +227,7 @@ class Pattern:
                     for token in sorted(head_verb_group[head_verb_id], key=lambda t: t.id):
                         print('\t', token.id, token.text)
                     print('\n---------------------\n')
-        if copy_conj_subject is True:
+        if copy_conj_subject:
             head_verb_group = self.copy_subject_across_conjunctions(head_verb_group)
         for head_verb_id in head_verb_group:
             head_verb_group[head_verb_id].sort(key=lambda t: t.id)
@@ -77,13 +77,13 @@ class PatternNL(Pattern):
         return any(self.is_past_tense(token) for token in clause)
 
     def is_perfect_tense_clause(self, clause: Clause):
-        if isinstance(clause, Clause) is False:
+        if not isinstance(clause, Clause):
             raise TypeError(f"past perfect can only be determined for Clause, not for {type(clause)}")
         verbs = self.get_verbs(clause)
         if self._has_aux_perfect(verbs):
             if self._has_verb_participle(verbs):
                 return True
-            elif [self.is_infinitive_verb(token) for token in verbs].count(True) >= 2:
+            elif sum(1 for token in verbs if self.is_infinitive_verb(token)) >= 2:
                 return True
         return False
 
@@ -91,7 +91,7 @@ class PatternNL(Pattern):
         verbs = self.get_verbs(clause)
         if len(verbs) == 0:
             return False
-        return self.is_perfect_tense_clause(clause) is False and self._has_verb_finite(verbs)
+        return not self.is_perfect_tense_clause(clause) and self._has_verb_finite(verbs)
 
     def is_past_perfect_clause(self, clause: Clause):
         return self.is_perfect_tense_clause(clause) and self.has_aux_past(clause)
@@ -189,7 +189,7 @@ class PatternNL(Pattern):
                     print('\t\thas no root nor finite verb - merging group')
                 head_finite_verb_id = self.get_head_finite_verb_id(head_verb_id, tokens)
                 finite_verb_group[head_finite_verb_id].extend(head_verb_group[head_verb_id])
-        if copy_conj_subject is True:
+        if copy_conj_subject:
             finite_verb_group = self.copy_subject_across_conjunctions(head_verb_group)
         return finite_verb_group
 
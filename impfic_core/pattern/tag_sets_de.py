@@ -1,8 +1,8 @@
-VERB_POS = {'VERB', 'AUX'}
-SUBS = {'sb'}
-OBJS = {'oa', 'oa2', 'og'}
+VERB_POS = frozenset({'VERB', 'AUX'})
+SUBS = frozenset({'sb'})
+OBJS = frozenset({'oa', 'oa2', 'og'})
 SUB_OBJS = SUBS.union(OBJS)
-NON_HEAD_VERB_DEPRELS = {'xcomp', 'nsubj:pass', None}
+NON_HEAD_VERB_DEPRELS = frozenset({'xcomp', 'nsubj:pass', None})
 
 
 pos_tags = [
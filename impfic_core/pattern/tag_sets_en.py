@@ -1,9 +1,9 @@
 # HEAD_VERB_DEPRELS = {'xcomp', 'cc', 'conj', 'nsubj:pass'}
-VERB_POS = {'VERB', 'AUX'}
-SUBS = {'nsubj', 'nsubj:pass', 'csubj'}
-OBJS = {'obj', 'iobj', 'dobj', 'pobj', 'obl:agent'}
-SUB_OBJS = {'nsubj', 'nsubj:pass', 'csubj', 'obj', 'iobj', 'obl:agent'}
-NON_HEAD_VERB_DEPRELS = {'xcomp', 'nsubj:pass', None}
+VERB_POS = frozenset({'VERB', 'AUX'})
+SUBS = frozenset({'nsubj', 'nsubj:pass', 'csubj'})
+OBJS = frozenset({'obj', 'iobj', 'dobj', 'pobj', 'obl:agent'})
+SUB_OBJS = frozenset({'nsubj', 'nsubj:pass', 'csubj', 'obj', 'iobj', 'obl:agent'})
+NON_HEAD_VERB_DEPRELS = frozenset({'xcomp', 'nsubj:pass', None})
 
 
 pos_tags = [
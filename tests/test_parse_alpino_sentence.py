@@ -0,0 +1,153 @@
+import contextlib
+import io
+import json
+import unittest
+
+import impfic_core.parse.parse_alpino_sentence as parse_alpino
+
+
+def make_word(node_id, rel, word, pos, begin, **props):
+    node = {'@id': node_id, '@rel': rel, '@word': word, '@pos': pos, '@pt': pos,
+            '@frame': f"{pos}(x)", '@begin': begin, '@end': begin + 1}
+    node.update({f"@{key}": value for key, value in props.items()})
+    return node
+
+
+def make_sentence():
+    """Jan wil haar het boek geven ('Jan wants to give her the book'), with a top node
+    that has a single child stored as a dictionary, as in the Alpino JSON output."""
+    inf_node = {'@id': 4, '@rel': 'vc', '@cat': 'inf', '@begin': 0, '@end': 6, 'node': [
+        {'@id': 5, '@rel': 'su', '@index': 1, '@begin': 0, '@end': 1},
+        make_word(6, 'obj2', 'haar', 'pron', 2, persoon='3', vwtype='pers', case='dat_acc'),
+        {'@id': 7, '@rel': 'obj1', '@cat': 'np', '@begin': 3, '@end': 5, 'node': [
+            make_word(8, 'det', 'het', 'det', 3),
+            make_word(9, 'hd', 'boek', 'noun', 4),
+        ]},
+        make_word(10, 'hd', 'geven', 'verb', 5),
+    ]}
+    smain_node = {'@id': 1, '@rel': '--', '@cat': 'smain', '@begin': 0, '@end': 6, 'node': [
+        make_word(2, 'su', 'Jan', 'noun', 0, index=1),
+        make_word(3, 'hd', 'wil', 'verb', 1, wvorm='pv'),
+        inf_node,
+    ]}
+    root = {'@id': 0, '@rel': 'top', '@cat': 'top', '@begin': 0, '@end': 6, 'node': smain_node}
+    tree = {'node': root, 'sentence': {'#text': 'Jan wil haar het boek geven'}}
+    return {'alpino_ds': json.dumps(tree)}
+
+
+class TestParseTree(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tree, self.inverse_tree, self.nodes = parse_alpino.parse_tree(make_sentence())
+
+    def test_parse_tree_node_order(self):
+        # nodes in a list of children come before their descendants,
+        # single child nodes and the root after their descendants
+        self.assertEqual([2, 3, 4, 5, 6, 7, 8, 9, 10, 1, 0], list(self.nodes))
+
+    def test_parse_tree_inverse_tree(self):
+        expected = {1: 0, 2: 1, 3: 1, 4: 1, 5: 4, 6: 4, 7: 4, 8: 7, 9: 7, 10: 4}
+        self.assertEqual(expected, self.inverse_tree)
+
+    def test_parse_tree_normalises_single_child(self):
+        root = self.tree['node']
+        self.assertIsInstance(root['node'], list)
+        self.assertIs(self.nodes[1], root['node'][0])
+        self.assertEqual(list(range(1, 11)), sorted(node['@id'] for node in parse_alpino.get_descendants(root)))
+
+    def test_get_word_nodes_handles_single_child(self):
+        root = json.loads(make_sentence()['alpino_ds'])['node']
+        self.assertIsInstance(root['node'], dict)
+        words = [node['@word'] for node in parse_alpino.get_word_nodes(root)]
+        self.assertEqual(['Jan', 'wil', 'haar', 'het', 'boek', 'geven'], words)
+
+
+class TestNodeRelations(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tree, self.inverse_tree, self.nodes = parse_alpino.parse_tree(make_sentence())
+
+    def test_is_descendant_of_direct_parent(self):
+        for nodes in [self.nodes, dict(self.nodes)]:
+            with self.subTest(type(nodes).__name__):
+                self.assertTrue(parse_alpino.is_descendant_of(nodes[8], nodes[7], nodes, self.inverse_tree))
+                self.assertTrue(parse_alpino.is_descendant_of(nodes[8], nodes[1], nodes, self.inverse_tree))
+                self.assertFalse(parse_alpino.is_descendant_of(nodes[7], nodes[8], nodes, self.inverse_tree))
+                self.assertFalse(parse_alpino.is_descendant_of(nodes[8], nodes[8], nodes, self.inverse_tree))
+                self.assertTrue(parse_alpino.is_ancestor_of(nodes[7], nodes[8], nodes, self.inverse_tree))
+
+    def test_indirect_object_node_is_its_own_indirect_object(self):
+        self.assertIs(self.nodes[6], parse_alpino.get_indirect_object(self.nodes[6], self.nodes))
+        self.assertIs(self.nodes[6], parse_alpino.get_indirect_object(self.nodes[1], self.nodes))
+
+    def test_get_nodes_by_tag(self):
+        subject_ids = [node['@id'] for node in parse_alpino.get_nodes_by_tag('su', self.nodes)]
+        self.assertEqual([2, 5], subject_ids)
+        self.assertEqual([], parse_alpino.get_nodes_by_tag('obj3', self.nodes))
+
+    def test_get_subject_resolves_reference_node(self):
+        self.assertIs(self.nodes[2], parse_alpino.get_subject(self.nodes[4], self.nodes))
+
+
+class TestMainElements(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tree, self.inverse_tree, self.nodes = parse_alpino.parse_tree(make_sentence())
+
+    def test_get_sent_node_main_elements(self):
+        # main verbal nodes are listed in the node order of parse_tree
+        main_elements = parse_alpino.get_sent_node_main_elements(self.nodes)
+        summary = [{key: node_ids(value) for key, value in elements.items()} for elements in main_elements]
+        self.assertEqual([
+            {'verbal_node': 4, 'subject': 2, 'direct_object': 7, 'indirect_object': 6,
+             'finite_verb': None, 'main_verb': 10, 'verb_nodes': [10]},
+            {'verbal_node': 1, 'subject': 2, 'direct_object': 7, 'indirect_object': 6,
+             'finite_verb': 3, 'main_verb': 10, 'verb_nodes': [3, 10]},
+        ], summary)
+
+    def test_main_elements_match_single_getters(self):
+        for elements in parse_alpino.get_sent_node_main_elements(self.nodes):
+            node = elements['verbal_node']
+            self.assertIs(parse_alpino.get_subject(node, self.nodes), elements['subject'])
+            self.assertIs(parse_alpino.get_direct_object(node, self.nodes), elements['direct_object'])
+            self.assertIs(parse_alpino.get_indirect_object(node, self.nodes), elements['indirect_object'])
+            self.assertIs(parse_alpino.get_finite_verb(node), elements['finite_verb'])
+
+    def test_get_node_words(self):
+        words = parse_alpino.get_node_words(self.nodes[1], self.nodes, self.inverse_tree)
+        self.assertEqual('Jan wil haar het boek geven', words)
+        self.assertEqual('haar het boek geven',
+                         parse_alpino.get_node_words(self.nodes[4], self.nodes, self.inverse_tree))
+        self.assertEqual('haar', parse_alpino.get_node_words(self.nodes[6], self.nodes, self.inverse_tree))
+        self.assertIsNone(parse_alpino.get_node_words(None, self.nodes, self.inverse_tree))
+
+    def test_get_node_words_uses_cache(self):
+        words = parse_alpino.get_node_words(self.nodes[7], self.nodes, self.inverse_tree)
+        self.assertEqual({7: 'het boek'}, self.nodes.node_words)
+        self.assertEqual(words, parse_alpino.get_node_words(self.nodes[7], self.nodes, self.inverse_tree))
+        self.assertEqual(words, parse_alpino.get_node_words(self.nodes[7], dict(self.nodes), self.inverse_tree))
+        # a repeated call reads the words from the cache
+        self.nodes.node_words[7] = 'cached words'
+        self.assertEqual('cached words', parse_alpino.get_node_words(self.nodes[7], self.nodes, self.inverse_tree))
+
+    def test_get_descendant_words_cache_returns_copies(self):
+        words = parse_alpino.get_descendant_words(self.nodes[7], self.nodes)
+        words.append(self.nodes[2])
+        self.assertEqual([8, 9], node_ids(parse_alpino.get_descendant_words(self.nodes[7], self.nodes)))
+
+    def test_print_sent_main_elements(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            parse_alpino.print_sent_main_elements(self.tree, self.inverse_tree, self.nodes)
+        lines = output.getvalue().split('\n')
+        self.assertEqual('Jan wil haar het boek geven', lines[0])
+        self.assertIn('\tindirect object: 6\tpron\thaar', lines)
+
+
+def node_ids(value):
+    if isinstance(value, list):
+        return [node['@id'] for node in value]
+    return value['@id'] if value is not None else None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+
+import networkx as nx
+
+import impfic_core.parse.parse_book_metadata as meta_parse
+
+
+def make_record(dc_data):
+    return {'srw:recordData': {'srw_dc:dc': dc_data}}
+
+
+class TestPublicationYear(unittest.TestCase):
+
+    def test_publication_year_handles_date_formats(self):
+        dates = {
+            '1999': 1999,
+            '[1999]': 1999,
+            '[1999] 2005': 1999,
+            'cop. 2001': 2001,
+            'cop. 2001]': 2001,
+            '1987-...': 1987,
+            '1499': None,
+            'onbekend': None,
+            '199²': None,
+            '١٩٩٩': 1999,
+        }
+        for date, year in dates.items():
+            with self.subTest(date):
+                record = make_record({'dc:date': date})
+                self.assertEqual(year, meta_parse.get_record_publication_year(record))
+
+    def test_publication_year_without_date_returns_none(self):
+        self.assertIsNone(meta_parse.get_record_publication_year(make_record({})))
+
+
+class TestRecordFields(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.record = make_record({
+            'dc:identifier': {'@xsi:type': 'dcterms:ISBN', '#text': '9789023456789'},
+            'dc:creator': 'Hella Haasse',
+            'dc:subject': {'@xsi:type': 'dcx:NUR', '#text': '301'},
+        })
+
+    def test_single_identifier_is_parsed(self):
+        self.assertEqual(['9789023456789'], meta_parse.get_record_isbns(self.record))
+
+    def test_record_getters_do_not_change_record(self):
+        meta_parse.get_record_isbns(self.record)
+        meta_parse.get_record_identifiers(self.record)
+        meta_parse.get_record_subjects(self.record)
+        meta_parse.get_record_creators(self.record)
+        dc_data = self.record['srw:recordData']['srw_dc:dc']
+        self.assertIsInstance(dc_data['dc:identifier'], dict)
+        self.assertIsInstance(dc_data['dc:subject'], dict)
+        self.assertIsInstance(dc_data['dc:creator'], str)
+
+    def test_creators_include_contributors_without_creator(self):
+        record = make_record({'dc:contributor': {'@dcx:role': 'trl', '#text': 'Jan Janssen'}})
+        creators = meta_parse.get_record_creators(record)
+        self.assertEqual({'Jan Janssen'}, creators['trl'])
+
+
+class TestAddRecordNodes(unittest.TestCase):
+
+    def test_existing_isbn_node_merges_attributes(self):
+        work_graph = nx.Graph()
+        isbn = {'@xsi:type': 'dcterms:ISBN', '#text': '9789023456789'}
+        meta_parse.add_record_nodes(work_graph, make_record({'dc:identifier': isbn, 'dc:date': '1999'}))
+        meta_parse.add_record_nodes(work_graph, make_record({
+            'dc:identifier': isbn,
+            'dc:date': '2005',
+            'dc:subject': {'@xsi:type': 'dcx:NUR', '#text': '301'},
+        }))
+        node = work_graph.nodes['isbn__9789023456789']
+        self.assertEqual('isbn', node['type'])
+        self.assertEqual({1999, 2005}, node['year'])
+        self.assertEqual({'301'}, node['nur'])
+
+    def test_record_isbns_are_linked_to_each_other_and_ppns(self):
+        work_graph = nx.Graph()
+        meta_parse.add_record_nodes(work_graph, make_record({'dc:identifier': [
+            {'@xsi:type': 'dcterms:ISBN', '#text': '9789023456789'},
+            {'@xsi:type': 'dcterms:ISBN', '#text': '9023456789'},
+            {'@xsi:type': 'dcterms:URI', '#text': 'http://resolver.kb.nl/resolve?urn=PPN:123456789'},
+        ]}))
+        self.assertTrue(work_graph.has_edge('isbn__9789023456789', 'isbn__9023456789'))
+        self.assertTrue(work_graph.has_edge('isbn__9789023456789', 'ppn__123456789'))
+        self.assertTrue(work_graph.has_edge('isbn__9023456789', 'ppn__123456789'))
+
+    def test_isbn_nodes_of_record_do_not_share_sets(self):
+        subjects = {'dcx:NUR': {'301'}}
+        _, attr_dict1 = meta_parse.make_isbn_node('1', subjects, {'aut': {'A'}}, {}, 1999)
+        _, attr_dict2 = meta_parse.make_isbn_node('2', subjects, {'aut': {'A'}}, {}, 1999)
+        self.assertEqual({1999}, attr_dict1['year'])
+        self.assertEqual({'A'}, attr_dict1['author'])
+        attr_dict1['nur'].add('302')
+        self.assertEqual({'301'}, attr_dict2['nur'])
+        self.assertEqual({'301'}, subjects['dcx:NUR'])
+
+    def test_parse_record_collects_identifiers_and_isbns(self):
+        record = make_record({'dc:identifier': [
+            {'@xsi:type': 'dcterms:ISBN', '#text': '9789023456789'},
+            {'@xsi:type': 'dcterms:URI', '#text': 'http://resolver.kb.nl/resolve?urn=PPN:123456789'},
+        ], 'dc:date': '1999'})
+        parsed = meta_parse.parse_record(record)
+        self.assertEqual(['9789023456789'], parsed.isbns)
+        self.assertEqual(meta_parse.get_record_field_values(record, 'dc:identifier'), parsed.identifiers)
+        self.assertEqual(['123456789'], parsed.ppn_ids)
+        self.assertEqual(1999, parsed.year)
+
+    def test_batch_of_records_gives_same_graph_as_single_records(self):
+        records = [
+            make_record({'dc:identifier': [
+                {'@xsi:type': 'dcterms:ISBN', '#text': '1'},
+                {'@xsi:type': 'dcterms:ISBN', '#text': '2'},
+                {'@xsi:type': 'dcterms:URI', '#text': 'http://resolver.kb.nl/resolve?urn=PPN:9'},
+            ], 'dc:date': '1999'}),
+            make_record({'dc:identifier': [
+                {'@xsi:type': 'dcterms:ISBN', '#text': '2'},
+                {'@xsi:type': 'dcterms:ISBN', '#text': '3'},
+            ], 'dc:date': '2005', 'dc:subject': {'@xsi:type': 'dcx:NUR', '#text': '301'}}),
+        ]
+        single_graph = nx.Graph()
+        for record in records:
+            meta_parse.add_record_nodes(single_graph, record)
+        batch_graph = nx.Graph()
+        meta_parse.add_records_nodes(batch_graph, records)
+        self.assertEqual(list(single_graph.nodes(data=True)), list(batch_graph.nodes(data=True)))
+        self.assertEqual(set(single_graph.edges), set(batch_graph.edges))
+        self.assertEqual({1999, 2005}, batch_graph.nodes['isbn__2']['year'])
@@ -45,6 +45,19 @@ class TestDocSentTokenAPI(unittest.TestCase):
         sent = self.doc.sentences[0]
         self.assertEqual(True, all([isinstance(token, parse_docs.Token) for token in sent]))
 
+    def test_doc_as_arrays_has_one_element_per_token(self):
+        arrays = self.doc.as_arrays()
+        for field in arrays:
+            with self.subTest(field):
+                self.assertEqual(len(self.doc), len(arrays[field]))
+
+    def test_doc_as_arrays_follows_token_order(self):
+        arrays = self.doc.as_arrays()
+        token = self.doc.sentences[1].tokens[2]
+        self.assertEqual(token.upos, arrays['upos'][token.doc_idx])
+        self.assertEqual(token.head, arrays['head'][token.doc_idx])
+        self.assertEqual(1, arrays['sent_idx'][token.doc_idx])
+
 
 class TestTrankitParsing(unittest.TestCase):
 
@@ -61,6 +74,41 @@ class TestTrankitParsing(unittest.TestCase):
         merged_doc = parse_docs.merge_docs([self.doc, self.doc])
         self.assertEqual(2 * len(self.doc.tokens), len(merged_doc.tokens))
 
+    def test_merge_docs_shifts_token_offsets(self):
+        merged_doc = parse_docs.merge_docs([self.doc, self.doc])
+        for ti, token in enumerate(merged_doc.tokens):
+            with self.subTest(ti):
+                self.assertEqual(ti, token.doc_idx)
+                self.assertEqual(token.text, merged_doc.text[token.start:token.end])
+
+    def test_merge_docs_does_not_change_input_docs(self):
+        first_token = self.doc.tokens[0]
+        parse_docs.merge_docs([self.doc, self.doc])
+        self.assertEqual(self.doc.tokens[0], first_token)
+        self.assertEqual(0, self.doc.tokens[0].doc_idx)
+
+
+class TestParseFeatures(unittest.TestCase):
+
+    def test_parse_empty_features_returns_empty_dict(self):
+        self.assertEqual({}, parse_docs.parse_features(''))
+
+    def test_parse_features_splits_value_on_first_equals_sign(self):
+        feats = parse_docs.parse_features('Number=Sing|Foreign|Person=3|Odd=a=b')
+        self.assertEqual({'Number': 'Sing', 'Foreign': True, 'Person': 3, 'Odd': 'a=b'}, feats)
+
+
+class TestBatchParsing(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.spacy_file = 'tests/spacy_test_data.json.gz'
+        self.trankit_file = 'tests/trankit_test_data-1.json.gz'
+        self.docs_json = [read_chunk_file(self.trankit_file), read_chunk_file(self.spacy_file)]
+
+    def test_json_docs_to_docs_keeps_input_order(self):
+        docs = list(parse_docs.json_docs_to_docs(self.docs_json, workers=2))
+        self.assertEqual([parse_docs.json_to_doc(doc_json) for doc_json in self.docs_json], docs)
+
 
 class TestTrankitTokens(unittest.TestCase):
 
@@ -0,0 +1,114 @@
+import hashlib
+import importlib
+import random
+import re
+import sys
+import types
+import unittest
+from unittest import mock
+
+TEST_SALT = 'test-salt'
+
+
+def import_parse_review():
+    """Import parse_review with a stand-in for impfic_core.secrets, which is not
+    part of the repository."""
+    secrets = types.ModuleType('impfic_core.secrets')
+    secrets.salt = TEST_SALT
+    with mock.patch.dict(sys.modules, {'impfic_core.secrets': secrets}):
+        sys.modules.pop('impfic_core.parse.parse_review', None)
+        return importlib.import_module('impfic_core.parse.parse_review')
+
+
+parse_review = import_parse_review()
+
+
+def regex_quote_spans(text):
+    return [match.span() for match in re.finditer(parse_review.QUOTE_PATTERN, text)]
+
+
+class TestQuoteSpans(unittest.TestCase):
+
+    def test_find_quote_spans_matches_quote_pattern(self):
+        texts = {
+            'empty': '',
+            'no quotes': 'a review without quotes',
+            'double': 'she said "hello there" and left',
+            'single': "she said 'hello there' and left",
+            'mixed': 'a "b\' c \'d" e \'f"',
+            'unclosed': 'a "b c d',
+            'unclosed after closed': 'a "b" c "d',
+            'newline inside': 'a "b\nc" d "e" f',
+            'newline after quote': '"\n"',
+            'adjacent': '""\'\'"a""b"',
+            'only quotes': '"\'"\'"',
+        }
+        for name, text in texts.items():
+            with self.subTest(name):
+                self.assertEqual(regex_quote_spans(text), list(parse_review.find_quote_spans(text)))
+
+    def test_find_quote_spans_matches_quote_pattern_on_random_texts(self):
+        rnd = random.Random(42)
+        for _ in range(2000):
+            text = ''.join(rnd.choice('ab "\'\n') for _ in range(rnd.randint(0, 30)))
+            with self.subTest(text):
+                self.assertEqual(regex_quote_spans(text), list(parse_review.find_quote_spans(text)))
+
+    def test_has_quote_needs_more_than_40_characters(self):
+        # the span includes both quote characters
+        short_quote = '"' + 'x' * 38 + '"'
+        long_quote = '"' + 'x' * 39 + '"'
+        self.assertFalse(parse_review.has_quote({'text': f"before {short_quote} after"}))
+        self.assertTrue(parse_review.has_quote({'text': f"before {long_quote} after"}))
+        self.assertTrue(parse_review.has_quote({'review_text': long_quote}))
+        self.assertFalse(parse_review.has_quote({'text': ''}))
+
+    def test_split_on_quotes(self):
+        quote = '"' + 'x' * 45 + '"'
+        text = f"Before {quote} middle \"short\" end"
+        review = parse_review.split_on_quotes({'text': text})
+        parts = [(part['offset'], part['end'], part['text'], part['is_quote']) for part in review['split_text']]
+        quote_start = len('Before ')
+        quote_end = quote_start + len(quote)
+        self.assertEqual([
+            (0, quote_start, 'Before ', False),
+            (quote_start, quote_end, quote, True),
+            (quote_end, len(text), ' middle "short" end', False),
+        ], parts)
+
+    def test_split_on_quotes_starting_with_quote(self):
+        quote = "'" + 'x' * 45 + "'"
+        review = parse_review.split_on_quotes({'review_text': quote})
+        self.assertEqual([(0, len(quote), True), (len(quote), len(quote), False)],
+                         [(part['offset'], part['end'], part['is_quote']) for part in review['split_text']])
+
+
+class TestHashReviewerIds(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.reviewer_ids = ['reviewer-1', 'https://example.org/user/2', '', 'ëéü', 12345, None]
+
+    def test_hash_reviewer_id_uses_secret_salt(self):
+        expected = hashlib.sha512(f"reviewer-1__hebban{TEST_SALT}".encode()).hexdigest()
+        self.assertEqual(expected, parse_review.hash_reviewer_id('reviewer-1', collection_id='hebban'))
+
+    def test_hash_reviewer_ids_matches_hash_reviewer_id(self):
+        for collection_id in [None, 'hebban']:
+            for salt in [None, 'other-salt']:
+                with self.subTest(collection_id=collection_id, salt=salt):
+                    expected = [parse_review.hash_reviewer_id(reviewer_id, collection_id=collection_id, salt=salt)
+                                for reviewer_id in self.reviewer_ids]
+                    hashed = parse_review.hash_reviewer_ids(self.reviewer_ids, collection_id=collection_id, salt=salt)
+                    self.assertEqual(expected, hashed)
+
+    def test_hash_reviewer_ids_with_collection_prefix(self):
+        expected = [parse_review.hash_reviewer_id(reviewer_id, collection_id='nbd', collection_prefix='::')
+                    for reviewer_id in self.reviewer_ids]
+        hashed = parse_review.hash_reviewer_ids(self.reviewer_ids, collection_id='nbd', collection_prefix='::')
+        self.assertEqual(expected, hashed)
+        self.assertEqual(12345, hashed[4])
+        self.assertIsNone(hashed[5])
+
+
+if __name__ == '__main__':
+    unittest.main()
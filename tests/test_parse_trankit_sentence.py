@@ -0,0 +1,88 @@
+import unittest
+
+import impfic_core.parse.parse_trankit_sentence as parse_trankit
+
+
+def make_token(token_id, head, upos='NOUN', deprel='obj'):
+    return {'id': token_id, 'text': f"w{token_id}", 'upos': upos, 'deprel': deprel, 'head': head}
+
+
+class TestHeadVerb(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tokens = {
+            1: make_token(1, 2, upos='PRON', deprel='nsubj'),
+            2: make_token(2, 0, upos='VERB', deprel='root'),
+            3: make_token(3, 4, upos='DET', deprel='det'),
+            4: make_token(4, 2),
+        }
+
+    def test_get_head_verb_id_follows_head_chain(self):
+        self.assertEqual(2, parse_trankit.get_head_verb_id(4, self.tokens))
+        self.assertEqual(0, parse_trankit.get_head_verb_id(0, self.tokens))
+
+    def test_get_head_verb_id_fills_cache(self):
+        head_verb_cache = {}
+        parse_trankit.get_head_verb_id(3, self.tokens, head_verb_cache)
+        self.assertEqual({3: 2, 4: 2}, head_verb_cache)
+
+    def test_get_head_verb_id_handles_long_chains(self):
+        tokens = {token_id: make_token(token_id, token_id - 1) for token_id in range(1, 5001)}
+        self.assertEqual(0, parse_trankit.get_head_verb_id(5000, tokens))
+
+    def test_get_head_verb_id_raises_on_cycle(self):
+        tokens = {1: make_token(1, 2), 2: make_token(2, 1)}
+        with self.assertRaises(ValueError):
+            parse_trankit.get_head_verb_id(1, tokens)
+
+    def test_group_tokens_by_head_verb_adds_each_token_once(self):
+        head_verb_group = parse_trankit.group_tokens_by_head_verb(self.tokens)
+        self.assertEqual([2], list(head_verb_group))
+        token_ids = [token['id'] for token in head_verb_group[2]]
+        self.assertEqual([1, 2, 3, 4], sorted(token_ids))
+
+    def test_copy_subject_across_conjunctions(self):
+        # "she reads and writes": writes is a conjunct of reads without a subject of its own
+        tokens = {
+            1: make_token(1, 2, upos='PRON', deprel='nsubj'),
+            2: make_token(2, 0, upos='VERB', deprel='root'),
+            3: make_token(3, 4, upos='CCONJ', deprel='cc'),
+            4: make_token(4, 2, upos='VERB', deprel='conj'),
+        }
+        head_verb_group = parse_trankit.group_tokens_by_head_verb(tokens)
+        self.assertEqual([4, 3, 1], [token['id'] for token in head_verb_group[4]])
+        self.assertEqual([1, 2], sorted(token['id'] for token in head_verb_group[2]))
+
+
+class TestClusters(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sent = {'tokens': [
+            make_token(1, 2, upos='PRON', deprel='nsubj'),
+            make_token(2, 0, upos='VERB', deprel='root'),
+            make_token(3, 4, upos='DET', deprel='det'),
+            make_token(4, 2),
+        ]}
+
+    def test_get_subject_object_verb_clusters(self):
+        clusters = parse_trankit.get_subject_object_verb_clusters(self.sent)
+        self.assertEqual(1, len(clusters))
+        self.assertEqual([1], [token['id'] for token in clusters[0]['subject']])
+        self.assertEqual([4], [token['id'] for token in clusters[0]['object']])
+        self.assertEqual([2], [token['id'] for token in clusters[0]['verbs']])
+
+    def test_get_verb_clusters(self):
+        verb_clusters = parse_trankit.get_verb_clusters(self.sent)
+        self.assertEqual([[2]], [[token['id'] for token in cluster] for cluster in verb_clusters])
+
+    def test_sentence_view_groups_tokens_once(self):
+        sent_view = parse_trankit.analyze_sentence(self.sent)
+        self.assertIs(sent_view, parse_trankit.analyze_sentence(sent_view))
+        self.assertIs(sent_view.head_verb_group, sent_view.head_verb_group)
+        self.assertEqual(parse_trankit.get_subject_object_verb_clusters(self.sent),
+                         parse_trankit.get_subject_object_verb_clusters(sent_view))
+        self.assertEqual(parse_trankit.get_verb_clauses(self.sent), parse_trankit.get_verb_clauses(sent_view))
+
+
+if __name__ == '__main__':
+    unittest.main()